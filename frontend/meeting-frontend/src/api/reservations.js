@@ -6,8 +6,8 @@ export const checkRooms = data =>
 export const createReservation = data =>
   request.post('/api/reservations/create/', data)
 
-export const getMyReservations = () =>
-  request.get('/api/reservations/my/')
+export const getMyReservations = params =>
+  request.get('/api/reservations/my/', { params })
 
 export const cancelReservation = id =>
   request.post(`/api/reservations/${id}/cancel`)
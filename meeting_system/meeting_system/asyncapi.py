@@ -0,0 +1,86 @@
+"""
+原生异步视图的公共部分
+
+DRF 的 @api_view 只支持同步视图，ASGI 下每个请求都要经过一次线程切换。
+这里用纯 Django 的异步视图实现同样的约定：
+JWT 认证（失败返回 401，前端据此刷新 token）、{"code", "msg", "data"} 响应格式。
+"""
+
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+
+def api_response(code=0, msg="ok", data=None, status=200):
+    return JsonResponse(
+        {"code": code, "msg": msg, "data": data},
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={"ensure_ascii": False},
+    )
+
+
+async def authenticate(request, query_token=False):
+    """
+    校验 Authorization 头中的 JWT，返回令牌用户或 None
+    query_token 为 True 时也接受 ?token= 参数（浏览器 EventSource 无法设置请求头）
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is not None:
+        raw_token = auth.get_raw_token(header)
+    elif query_token:
+        raw_token = request.GET.get("token", "").encode() or None
+    else:
+        raw_token = None
+    if raw_token is None:
+        return None
+
+    try:
+        token = auth.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+
+    # 与同步接口相同，由令牌声明构造用户，不查库
+    if api_settings.USER_ID_CLAIM not in token:
+        return None
+    return api_settings.TOKEN_USER_CLASS(token)
+
+
+def async_api_view(methods, query_token=False):
+    """异步版 @api_view：检查请求方法、JWT 认证，并解析 JSON 请求体到 request.data"""
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {"detail": f'方法 "{request.method}" 不被允许。'}, status=405
+                )
+
+            user = await authenticate(request, query_token)
+            if user is None:
+                return JsonResponse(
+                    {"detail": "身份认证信息未提供或已失效。"}, status=401
+                )
+            request.user = user
+
+            request.data = {}
+            if request.body:
+                try:
+                    request.data = json.loads(request.body)
+                except ValueError:
+                    return api_response(400, "参数格式错误")
+
+            return await view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
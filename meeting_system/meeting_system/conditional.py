@@ -0,0 +1,52 @@
+"""
+条件请求（ETag）支持
+
+资源的版本戳由 MAX(updated_at) 与 COUNT(*) 组成：修改会推进 updated_at，
+删除会改变条数，二者任一变化 ETag 都会变化。
+客户端缓存仍然有效时直接返回 304，不做序列化。
+
+不发送 Last-Modified：删除、归档或关联数据（如会议室改名）不会推进 MAX(updated_at)，
+只带 If-Modified-Since 的客户端会误得 304；ETag 已包含这些输入。
+"""
+
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+
+def _etag(stamp, extra) -> str:
+    raw = f"{stamp['last'] and stamp['last'].isoformat()}|{stamp['total']}|{extra}"
+    return f'"{md5(raw.encode()).hexdigest()}"'
+
+
+def queryset_version(queryset, extra: str = ""):
+    """
+    计算查询集的版本戳（ETag）
+    extra 用于区分同一资源的不同表示（如分页参数）
+    """
+    stamp = queryset.aggregate(last=Max("updated_at"), total=Count("pk"))
+    return _etag(stamp, extra)
+
+
+async def aqueryset_version(queryset, extra: str = ""):
+    """queryset_version 的异步版本"""
+    stamp = await queryset.aaggregate(last=Max("updated_at"), total=Count("pk"))
+    return _etag(stamp, extra)
+
+
+def not_modified(request, etag):
+    """客户端副本仍然最新时返回 304 响应，否则返回 None"""
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, etag):
+    """写入 ETag，并要求浏览器每次带条件请求重新验证"""
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,177 @@
+"""
+按请求统计 SQL 的中间件（需在 settings 中开启 SQL_PROFILING_ENABLED）
+
+每个请求记录查询次数、SQL 总耗时、最慢的几条语句以及重复执行的语句（N+1 的典型特征），
+结果写入 Server-Timing 响应头（流式响应除外，其查询在响应头发出后才执行），
+并保存在进程内的环形缓冲区中，
+管理员可通过 GET /api/debug/sql-stats/ 查看按视图聚合的统计。
+未开启时中间件在启动阶段即被移除，没有任何额外开销。
+"""
+
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+# 最近请求的记录（进程内，deque 的 append 是线程安全的）
+records = deque(maxlen=getattr(settings, "SQL_PROFILING_BUFFER_SIZE", 1000))
+
+
+class QueryRecorder:
+    """作为 execute_wrapper 挂在数据库连接上，记录每条语句的耗时"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+def view_name(request):
+    """路由名（含命名空间，如 admin:index）；未匹配到路由时返回 None"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    return match.view_name
+
+
+class QueryProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "SQL_PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.top_n = getattr(settings, "SQL_PROFILING_TOP_N", 3)
+
+    def recording(self, recorder):
+        """在所有数据库连接上挂载 recorder 的上下文"""
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        return stack
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+
+        if response.streaming:
+            # 流式响应（网格、导出）的查询在中间件返回后、逐块输出时才执行，
+            # 此时响应头已经确定：不写 Server-Timing，输出结束后再记录统计；
+            # 异步流（SSE 长连接）不记录
+            if not response.is_async:
+                response.streaming_content = self.stream(
+                    response.streaming_content, request, response, recorder, start
+                )
+            return response
+
+        record = self.record(request, response, recorder, start)
+        response["Server-Timing"] = (
+            f'db;dur={record["db_ms"]:.2f};desc="{record["queries"]} queries", '
+            f'app;dur={record["total_ms"] - record["db_ms"]:.2f}'
+        )
+        response["Timing-Allow-Origin"] = "*"
+        return response
+
+    def stream(self, content, request, response, recorder, start):
+        try:
+            with self.recording(recorder):
+                yield from content
+        finally:
+            self.record(request, response, recorder, start)
+
+    def record(self, request, response, recorder, start) -> dict:
+        total = time.perf_counter() - start
+        queries = recorder.queries
+        db_time = sum(t for _, t in queries)
+        slowest = sorted(queries, key=lambda q: q[1], reverse=True)
+        duplicates = {
+            sql: n for sql, n in Counter(sql for sql, _ in queries).items() if n > 1
+        }
+        record = {
+            "view": view_name(request) or request.path,
+            "method": request.method,
+            "status": response.status_code,
+            "total_ms": total * 1000,
+            "db_ms": db_time * 1000,
+            "queries": len(queries),
+            "slowest": [(sql, t * 1000) for sql, t in slowest[: self.top_n]],
+            "duplicates": duplicates,
+        }
+        records.append(record)
+        return record
+
+
+def aggregate(items):
+    """按视图聚合：请求数、平均查询次数、SQL 耗时分位数、重复语句"""
+    grouped = defaultdict(list)
+    for r in items:
+        grouped[r["view"]].append(r)
+
+    stats = {}
+    for view, rs in grouped.items():
+        db = sorted(r["db_ms"] for r in rs)
+        total = sorted(r["total_ms"] for r in rs)
+        duplicates = Counter()
+        for r in rs:
+            duplicates.update(r["duplicates"])
+        slowest = sorted(
+            (q for r in rs for q in r["slowest"]), key=lambda q: q[1], reverse=True
+        )
+        stats[view] = {
+            "requests": len(rs),
+            "avg_queries": round(sum(r["queries"] for r in rs) / len(rs), 2),
+            "max_queries": max(r["queries"] for r in rs),
+            "avg_db_ms": round(sum(db) / len(db), 3),
+            "p95_db_ms": round(db[min(len(db) - 1, int(len(db) * 0.95))], 3),
+            "avg_total_ms": round(sum(total) / len(total), 3),
+            "p95_total_ms": round(
+                total[min(len(total) - 1, int(len(total) * 0.95))], 3
+            ),
+            "slowest": [{"sql": sql, "ms": round(ms, 3)} for sql, ms in slowest[:5]],
+            "duplicates": [
+                {"sql": sql, "count": n} for sql, n in duplicates.most_common(5)
+            ],
+        }
+    return stats
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, JWTAuthentication])
+@permission_classes([IsAdminUser])
+def sql_stats_view(request):
+    """
+    GET /api/debug/sql-stats/
+    仅管理员可见；?reset=1 返回后清空缓冲区
+    """
+    items = list(records)
+    if request.query_params.get("reset"):
+        records.clear()
+
+    return Response(
+        {
+            "code": 0,
+            "msg": "ok",
+            "data": {
+                "enabled": getattr(settings, "SQL_PROFILING_ENABLED", False),
+                "recorded": len(items),
+                "views": aggregate(items),
+            },
+        }
+    )
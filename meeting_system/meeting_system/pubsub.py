@@ -0,0 +1,98 @@
+"""
+进程内发布/订阅
+
+发布方可以在任意线程（同步视图、后台操作）调用 publish，不会阻塞；
+订阅方是运行在事件循环上的长连接（SSE），消息通过 call_soon_threadsafe 投递到各自的队列。
+一个订阅只占用一个队列，空闲时没有任何查询或轮询。
+
+只在单个进程内广播：多进程 / 多机部署时，将 REALTIME_BROKER 换成
+基于外部消息中间件（如 Redis Pub/Sub）、接口相同的实现即可。
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """一个订阅方；队列满时丢弃后续消息并标记 lagged，由订阅方决定如何恢复"""
+
+    def __init__(self, channels, queue_size):
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout=None):
+        """等待下一条消息，超时返回 None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, *channels) -> Subscription:
+        """须在事件循环中调用"""
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+            except RuntimeError:
+                # 事件循环已关闭，连接随之结束
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({s for subs in self._channels.values() for s in subs})
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                cls = import_string(
+                    getattr(
+                        settings,
+                        "REALTIME_BROKER",
+                        "meeting_system.pubsub.InProcessBroker",
+                    )
+                )
+                _broker = cls(queue_size=getattr(settings, "REALTIME_QUEUE_SIZE", 100))
+    return _broker
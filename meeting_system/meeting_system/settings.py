@@ -42,6 +42,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # SQL 统计，仅在 SQL_PROFILING_ENABLED = True 时生效
+    "meeting_system.profiling.QueryProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "meeting_system.urls"
@@ -77,9 +79,95 @@ DATABASES = {
 }
 
 
+# 缓存配置（本地用进程内缓存，生产环境可换成 Redis 等共享后端）
+# 例如：{"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://127.0.0.1:6379"}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# 会议室列表缓存使用的缓存别名及过期时间（秒）
+ROOM_CATALOG_CACHE = "default"
+ROOM_CATALOG_CACHE_TIMEOUT = 3600
+
+
+# 按请求统计 SQL（Server-Timing 响应头 + GET /api/debug/sql-stats/）
+SQL_PROFILING_ENABLED = False
+# 环形缓冲区保留的最近请求数
+SQL_PROFILING_BUFFER_SIZE = 1000
+# 每个请求记录最慢的语句条数
+SQL_PROFILING_TOP_N = 3
+
+
+# 预约写入方式："lock" 锁位图行后检查；"slot" 依赖时段表唯一约束，不加锁读
+RESERVATION_BOOKING_MODE = "lock"
+
+# 生命周期流转（run_lifecycle）：已通过的预约开始后多少分钟仍未确认使用视为未使用；每批处理条数
+RESERVATION_NO_SHOW_GRACE_MINUTES = 15
+RESERVATION_LIFECYCLE_BATCH_SIZE = 500
+
+# 归档（archive_reservations）：早于多少天且已结束流程的预约迁入归档表；每批条数
+RESERVATION_ARCHIVE_AFTER_DAYS = 180
+RESERVATION_ARCHIVE_BATCH_SIZE = 500
+
+# 使用统计：每天可预约的小时数，用于计算占用率
+ANALYTICS_OPEN_HOURS = 14
+
+# 可用性查询使用的冲突索引：DatabaseIndex 每次查库；MemoryIndex 在进程内缓存近期位图，
+# 预热天数见 RESERVATION_CONFLICT_INDEX_WARM_DAYS。多进程部署时位图版本号所在的缓存
+# （RESERVATION_OCCUPANCY_CACHE）必须是各进程共享的缓存（Redis、Memcached 等）
+RESERVATION_CONFLICT_INDEX = "reservations.conflicts.DatabaseIndex"
+RESERVATION_CONFLICT_INDEX_WARM_DAYS = 14
+# MemoryIndex 最多保存的天数，超出后淘汰最久未访问的日期
+RESERVATION_CONFLICT_INDEX_MAX_DAYS = 60
+RESERVATION_OCCUPANCY_CACHE = "default"
+
+# 可用会议室查询结果缓存：缓存别名、过期时间（秒）、人数分档、并发未命中时等待计算结果的最长秒数。
+# 多进程部署时 AVAILABILITY_CACHE 与 RESERVATION_OCCUPANCY_CACHE 都必须是共享缓存，
+# 默认的进程内缓存（LocMemCache）只适合单进程，其他进程的预约写入不会使本进程的结果失效
+AVAILABILITY_CACHE = "default"
+AVAILABILITY_CACHE_TIMEOUT = 60
+AVAILABILITY_CAPACITY_BUCKETS = [1, 5, 10, 20, 50, 100]
+AVAILABILITY_CACHE_WAIT = 2
+
+# 后台预约列表：总数最多精确计数的行数、首次进入默认显示的最近天数
+ADMIN_COUNT_LIMIT = 10000
+ADMIN_RECENT_DAYS = 30
+
+
+# 实时推送（SSE）：消息中间件实现、每个连接的积压上限、保活间隔（秒）
+# 进程内实现只在单个进程中广播，多进程部署需换成外部消息中间件的实现
+REALTIME_BROKER = "meeting_system.pubsub.InProcessBroker"
+REALTIME_QUEUE_SIZE = 100
+REALTIME_HEARTBEAT = 15
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
+# 密码哈希策略：PolicyPBKDF2PasswordHasher 的迭代次数由 PASSWORD_PBKDF2_ITERATIONS 决定，
+# None 表示沿用 Django 默认值；调整后用户下次登录时自动按新策略重新哈希
+PASSWORD_HASHERS = [
+    "users.hashers.PolicyPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = None
+
+# 登录校验：缓存别名、校验成功的缓存时间（秒，0 表示不缓存）、
+# 失败计数窗口（秒）及按用户名 / 按 IP 的失败上限
+LOGIN_CACHE = "default"
+LOGIN_VERIFY_CACHE_TIMEOUT = 300
+LOGIN_FAILURE_WINDOW = 300
+LOGIN_MAX_FAILURES_PER_USER = 5
+LOGIN_MAX_FAILURES_PER_IP = 50
+# 前端反向代理（nginx 等）的 IP 或网段：只有来自这些地址的请求才采信 X-Forwarded-For，
+# 未配置时按直连地址计数，经代理部署时所有用户会共用代理的 IP 计数
+LOGIN_TRUSTED_PROXIES = []
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -134,7 +222,8 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # 由令牌声明构造用户，认证不查 auth_user；其他字段按需加载
+        "rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
@@ -145,4 +234,5 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_USER_CLASS": "users.authentication.ClaimsUser",
 }
@@ -8,12 +8,15 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from .profiling import sql_stats_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),  # 后台管理路由
     path("api/auth/", include("users.urls")),
     path("api/rooms/", include("rooms.urls")),
     path("api/reservations/", include("reservations.urls")),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/debug/sql-stats/", sql_stats_view, name="sql_stats"),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,11 +1,73 @@
 from django import forms
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 
-from .models import Reservation
+from . import analytics, conflicts, events, export, occupancy
+from .approval import approve_batch
+from .models import ArchivedReservation, Reservation, RoomDailyUsage
+
+
+# ===============================
+# 大表分页
+# ===============================
+def estimated_rows(model, using="default"):
+    """表统计信息里的行数估算（MySQL / PostgreSQL），取不到时返回 None"""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "mysql":
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    elif connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row and row[0] and row[0] > 0:
+        return int(row[0])
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    列表页总数不再做全表 COUNT(*)：
+    最多数到 ADMIN_COUNT_LIMIT 行；超过时未筛选的列表用表统计信息估算，
+    筛选后的列表按上限分页（再往后请缩小筛选范围）
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_COUNT_LIMIT
+        # COUNT(*) FROM (SELECT ... LIMIT n)，扫描行数有上限
+        counted = queryset.order_by()[: limit + 1].count()
+        if counted <= limit:
+            return counted
+        if not queryset.query.has_filters():
+            estimate = estimated_rows(queryset.model, queryset.db)
+            if estimate:
+                return max(estimate, limit)
+        return limit
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """大表列表页：估算总数，按日期逐级筛选"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = "date"
 
 
 # ===============================
@@ -19,6 +81,20 @@ class ReservationAdminForm(forms.ModelForm):
     def clean(self):
         cleaned_data = super().clean()
 
+        # 编辑时加锁重新读取当前的 (room_id, date, start, end, status)：
+        # 表单加载后预约可能已被用户取消或被 run_lifecycle 流转，加载时的值不可信。
+        # changeform_view 整个处于事务中，锁一直持有到 save_model 写回并提交
+        self.current = None
+        if self.instance.pk:
+            try:
+                self.current = (
+                    Reservation.objects.select_for_update()
+                    .values_list("room_id", "date", "start_hour", "end_hour", "status")
+                    .get(pk=self.instance.pk)
+                )
+            except Reservation.DoesNotExist:
+                raise ValidationError("该预约已被删除")
+
         room = cleaned_data.get("room")
         date = cleaned_data.get("date")
         start = cleaned_data.get("start_hour")
@@ -33,49 +109,41 @@ class ReservationAdminForm(forms.ModelForm):
         now = timezone.localtime()
 
         # ---- 时间合法性 ----
-        if start < 0 or end > 23:
-            raise ValidationError("时间必须在 0-23 点之间")
-
-        if start >= end:
-            raise ValidationError("结束时间必须晚于开始时间")
+        try:
+            conflicts.validate_hours(start, end)
+        except ValueError as e:
+            raise ValidationError(str(e))
 
         # ---- 会议室状态 ----
         if not room.is_available:
             raise ValidationError("该会议室当前不可预约")
 
         # ---- 禁止改时间 ----
-        if self.instance.pk:
-            old = Reservation.objects.get(pk=self.instance.pk)
-            if old.status in ["REJECTED", "USED", "CANCELED"]:
-                if old.start_hour != start or old.end_hour != end or old.date != date:
-                    raise ValidationError("已驳回或已使用或已取消的预约禁止修改时间")
-
-        # ---- 时间冲突检查 ----
-        conflict_qs = (
-            Reservation.objects.filter(
-                room=room,
-                date=date,
-                status__in=["PENDING", "APPROVED", "USED"],
-            )
-            .exclude(id=self.instance.id)
-            .filter(start_hour__lt=end, end_hour__gt=start)
+        if self.current:
+            _, old_date, old_start, old_end, old_status = self.current
+            if old_status not in ["PENDING", "APPROVED"]:
+                if old_start != start or old_end != end or old_date != date:
+                    raise ValidationError("已结束流程的预约禁止修改时间")
+
+        # ---- 时间冲突检查（与用户接口共用规则，一次查询连同预约人）----
+        conflict = conflicts.find_conflict(
+            room.id, date, start, end, exclude_id=self.instance.pk
         )
-
-        if conflict_qs.exists():
-            c = conflict_qs.first()
-            raise ValidationError(
-                f"时间冲突：{c.user.username} {c.start_hour}:00-{c.end_hour}:00"
-            )
+        if conflict:
+            raise ValidationError(conflicts.describe(conflict))
 
         # ================== 状态流转校验 ==================
-        if self.instance.pk:
-            old_status = self.instance.status
+        if self.current:
+            old_status = self.current[4]
             allowed = {
                 "PENDING": ["APPROVED", "REJECTED", "CANCELED"],
                 "APPROVED": ["USED", "CANCELED"],
                 "REJECTED": [],
                 "CANCELED": [],
                 "USED": [],
+                "EXPIRED": [],
+                "NO_SHOW": [],
+                "COMPLETED": [],
             }
 
             if status != old_status and status not in allowed.get(old_status, []):
@@ -118,8 +186,10 @@ class ReservationAdminForm(forms.ModelForm):
 # Admin 配置
 # ===============================
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(LargeTableAdmin):
     form = ReservationAdminForm
+    # 用户、会议室用搜索下拉框，不再一次渲染全部选项
+    autocomplete_fields = ("user", "room")
 
     list_display = (
         "id",
@@ -132,7 +202,10 @@ class ReservationAdmin(admin.ModelAdmin):
         "approve_time",
     )
 
-    list_filter = ("status", "date", "room")
+    list_select_related = ("user", "room")
+
+    # 日期通过 date_hierarchy 逐级筛选
+    list_filter = ("status", "room")
     search_fields = ("user__username", "topic")
 
     fieldsets = (
@@ -148,6 +221,15 @@ class ReservationAdmin(admin.ModelAdmin):
 
     readonly_fields = ("approve_time",)
 
+    def changelist_view(self, request, extra_context=None):
+        # 从别处进入且没有任何条件时，默认只看最近 ADMIN_RECENT_DAYS 天起的预约；
+        # 在列表页内点“全部日期”等链接回到无条件列表时不再跳转
+        referer = urlsplit(request.META.get("HTTP_REFERER", "")).path
+        if request.method == "GET" and not request.GET and referer != request.path:
+            since = timezone.localdate() - timedelta(days=settings.ADMIN_RECENT_DAYS)
+            return HttpResponseRedirect(f"{request.path}?date__gte={since.isoformat()}")
+        return super().changelist_view(request, extra_context)
+
     # ---- 显示辅助 ----
     def time_range(self, obj):
         return f"{obj.start_hour}:00 - {obj.end_hour}:00"
@@ -161,6 +243,9 @@ class ReservationAdmin(admin.ModelAdmin):
             "REJECTED": "red",
             "CANCELED": "gray",
             "USED": "blue",
+            "EXPIRED": "gray",
+            "NO_SHOW": "purple",
+            "COMPLETED": "teal",
         }
         return format_html(
             '<b style="color:{}">{}</b>',
@@ -175,53 +260,64 @@ class ReservationAdmin(admin.ModelAdmin):
     # ===============================
     @admin.action(description="审批通过")
     def approve_reservations(self, request, queryset):
-        now = timezone.now()
-        success = 0
-
-        for r in queryset:
-            if r.status != "PENDING":
-                continue
-
-            # 过期不能审批
-            if r.date < timezone.localdate():
-                continue
-
-            # 冲突校验
-            conflict = (
-                Reservation.objects.filter(
-                    room=r.room,
-                    date=r.date,
-                    status__in=["APPROVED", "USED"],
-                )
-                .exclude(id=r.id)
-                .filter(
-                    start_hour__lt=r.end_hour,
-                    end_hour__gt=r.start_hour,
-                )
-                .exists()
+        # PENDING → APPROVED 不改变占用位图，批量判定冲突后一次写回
+        approved_ids, skipped = approve_batch(queryset)
+
+        self.message_user(request, f"{len(approved_ids)} 条预约审批通过")
+        if skipped:
+            detail = "；".join(f"#{pk} {reason}" for pk, reason in skipped)
+            self.message_user(
+                request,
+                f"{len(skipped)} 条预约未通过审批：{detail}",
+                level=messages.WARNING,
             )
 
-            if conflict:
-                continue
-
-            r.status = "APPROVED"
-            r.approve_time = now
-            r.save()
-            success += 1
-
-        self.message_user(request, f"{success} 条预约审批通过")
-
     @admin.action(description="驳回预约")
     def reject_reservations(self, request, queryset):
         now = timezone.now()
-        updated = queryset.filter(status="PENDING").update(
-            status="REJECTED",
-            reject_reason="管理员后台驳回",
-            approve_time=now,
-        )
+        with transaction.atomic():
+            pending = queryset.filter(status="PENDING").select_for_update()
+            rows = list(
+                pending.only(
+                    "id",
+                    "user_id",
+                    "room_id",
+                    "date",
+                    "start_hour",
+                    "end_hour",
+                    "topic",
+                )
+            )
+            updated = pending.update(
+                status="REJECTED",
+                reject_reason="管理员后台驳回",
+                approve_time=now,
+                updated_at=now,
+            )
+            occupancy.release_many(
+                [(r.room_id, r.date, r.start_hour, r.end_hour) for r in rows]
+            )
+            for r in rows:
+                r.status = "REJECTED"
+            events.publish(events.REJECTED, rows)
         self.message_user(request, f"{updated} 条预约已驳回")
 
-    actions = [approve_reservations, reject_reservations]
+    def _export(self, queryset, fmt):
+        content, content_type = export.stream([queryset], fmt)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="reservations.{fmt}"'
+        return response
+
+    @admin.action(description="导出所选 (CSV)")
+    def export_csv(self, request, queryset):
+        # 全选所有页时 queryset 即当前筛选条件下的全部记录，分段读取，不受数量限制
+        return self._export(queryset, "csv")
+
+    @admin.action(description="导出所选 (JSONL)")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, "jsonl")
+
+    actions = [approve_reservations, reject_reservations, export_csv, export_jsonl]
 
     # ---- 保存钩子 ----
     def save_model(self, request, obj, form, change):
@@ -236,9 +332,100 @@ class ReservationAdmin(admin.ModelAdmin):
             if obj.status in ["APPROVED", "REJECTED"] and not obj.approve_time:
                 obj.approve_time = timezone.now()
 
+        # changeform_view 已处于事务中，位图与预约一起提交；
+        # 修改前的值取表单校验时加锁读到的当前行，而不是表单加载时的值
+        old = form.current if change else None
+
         super().save_model(request, obj, form, change)
 
+        new = (obj.room_id, obj.date, obj.start_hour, obj.end_hour, obj.status)
+        occupancy.apply_change(old, new)
+
+        # 推送变动：新建、状态变更或改期
+        if old is None:
+            events.publish(events.CREATED, [obj])
+        elif old[4] != obj.status:
+            events.publish(events.STATUS_EVENTS[obj.status], [obj])
+        elif old[:4] != new[:4]:
+            events.publish(events.UPDATED, [obj], previous=old[:4])
+
+        # 改到其他会议室或日期：原来那天的使用统计也要重算
+        if old is not None and old[:2] != new[:2]:
+            analytics.mark_dirty(old[0], old[1])
+
+    def delete_queryset(self, request, queryset):
+        # post_delete 逐行触发，使用统计的待重算标记合并为一条 UPDATE
+        with analytics.batched_dirty():
+            super().delete_queryset(request, queryset)
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         form.request = request
         return form
+
+
+@admin.register(ArchivedReservation)
+class ArchivedReservationAdmin(LargeTableAdmin):
+    """归档的历史预约，只读"""
+
+    list_display = (
+        "id",
+        "user",
+        "room",
+        "date",
+        "time_range",
+        "topic",
+        "status",
+        "archived_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("user__username", "topic")
+    list_select_related = ("user", "room")
+
+    def time_range(self, obj):
+        return f"{obj.start_hour}:00 - {obj.end_hour}:00"
+
+    time_range.short_description = "时间段"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RoomDailyUsage)
+class RoomDailyUsageAdmin(admin.ModelAdmin):
+    """使用统计日汇总，只读；由 rollup_usage 命令维护"""
+
+    list_display = (
+        "room",
+        "date",
+        "booked_hours",
+        "used_hours",
+        "canceled_hours",
+        "no_show_hours",
+        "booked_slots",
+    )
+    list_filter = ("room",)
+    list_select_related = ("room",)
+    date_hierarchy = "date"
+
+    def booked_slots(self, obj):
+        return ", ".join(
+            f"{start}-{end}" for start, end in occupancy.mask_runs(obj.booked_mask)
+        )
+
+    booked_slots.short_description = "预约时段"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,251 @@
+"""
+会议室使用统计
+
+RoomDailyUsage 每个 (会议室, 日期) 一行，由预约表与归档表重算得到：
+- 增量：取 updated_at 晚于水位线（已汇总数据中最大的 source_updated_at）的预约，
+  只重算它们所在的 (会议室, 日期)；所有写入路径都会推进 updated_at。
+  水位线回退一段时间再比较，避免漏掉提交较晚的事务，重算本身是幂等的
+- 删除：post_delete 信号把当天的汇总行标记为 dirty，下次一并重算；
+  批量删除放在 batched_dirty() 中，合并为一条 UPDATE；归档不标记（汇总同样读取归档表）
+- 回填：按日期范围全部重算
+
+报表只查询汇总表。
+"""
+
+import operator
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import ExtractWeekDay
+
+from . import occupancy
+from rooms.models import MeetingRoom
+
+from .models import ArchivedReservation, Reservation, RoomDailyUsage
+
+# 占用过会议室的状态（过期的待审批从未生效，不计入）
+BOOKED_STATUSES = ["PENDING", "APPROVED", "USED", "COMPLETED", "NO_SHOW"]
+USED_STATUSES = ["USED", "COMPLETED"]
+
+WATERMARK_OVERLAP = timedelta(minutes=5)
+ROLLUP_BATCH_SIZE = 500
+
+COUNTERS = [
+    "booked_hours",
+    "used_hours",
+    "canceled_hours",
+    "no_show_hours",
+    "booked_mask",
+    "source_updated_at",
+]
+
+
+def _summarize(rows):
+    """rows: [(room_id, date, start, end, status, updated_at)] → {(room_id, date): RoomDailyUsage}"""
+    usage = {}
+    for room_id, date, start, end, status, updated_at in rows:
+        day = usage.get((room_id, date))
+        if day is None:
+            day = usage[(room_id, date)] = RoomDailyUsage(
+                room_id=room_id, date=date, source_updated_at=updated_at
+            )
+        hours = end - start
+        if status in BOOKED_STATUSES:
+            day.booked_hours += hours
+            day.booked_mask |= occupancy.hours_mask(start, end)
+        if status in USED_STATUSES:
+            day.used_hours += hours
+        elif status == "CANCELED":
+            day.canceled_hours += hours
+        elif status == "NO_SHOW":
+            day.no_show_hours += hours
+        day.source_updated_at = max(day.source_updated_at, updated_at)
+    return usage
+
+
+def recompute(keys):
+    """重算给定的 (room_id, date)，没有预约的日子删除汇总行"""
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    fields = ("room_id", "date", "start_hour", "end_hour", "status", "updated_at")
+    rows = []
+    for model in (Reservation, ArchivedReservation):
+        rows += [
+            row
+            for row in model.objects.filter(
+                room_id__in={room_id for room_id, _ in keys},
+                date__in={date for _, date in keys},
+            ).values_list(*fields)
+            if (row[0], row[1]) in keys
+        ]
+    usage = _summarize(rows)
+
+    with transaction.atomic():
+        RoomDailyUsage.objects.bulk_create(
+            usage.values(),
+            update_conflicts=True,
+            unique_fields=["room", "date"],
+            update_fields=COUNTERS + ["dirty"],
+        )
+        empty = keys - usage.keys()
+        if empty:
+            for room_id, date in empty:
+                RoomDailyUsage.objects.filter(room_id=room_id, date=date).delete()
+    return len(keys)
+
+
+def _in_batches(keys, size=ROLLUP_BATCH_SIZE):
+    keys = sorted(keys, key=lambda k: (k[1], k[0]))
+    for i in range(0, len(keys), size):
+        yield keys[i : i + size]
+
+
+def refresh():
+    """增量重算自上次以来有变化的日子，返回重算的 (会议室, 日期) 数"""
+    watermark = RoomDailyUsage.objects.aggregate(last=Max("source_updated_at"))["last"]
+
+    changed = Reservation.objects.all()
+    if watermark is not None:
+        changed = changed.filter(updated_at__gte=watermark - WATERMARK_OVERLAP)
+    keys = set(changed.values_list("room_id", "date").distinct())
+    keys |= set(
+        RoomDailyUsage.objects.filter(dirty=True).values_list("room_id", "date")
+    )
+
+    return sum(recompute(batch) for batch in _in_batches(keys))
+
+
+def backfill(date_from=None, date_to=None):
+    """按日期范围全部重算"""
+    keys = set()
+    for model in (Reservation, ArchivedReservation, RoomDailyUsage):
+        qs = model.objects.all()
+        if date_from:
+            qs = qs.filter(date__gte=date_from)
+        if date_to:
+            qs = qs.filter(date__lte=date_to)
+        keys |= set(qs.values_list("room_id", "date").distinct())
+
+    return sum(recompute(batch) for batch in _in_batches(keys))
+
+
+_local = threading.local()
+
+
+def mark_dirty(room_id, date):
+    """标记 (会议室, 日期) 待重算；在 batched_dirty() 块内先收集，退出时一并标记"""
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.add((room_id, date))
+        return
+    RoomDailyUsage.objects.filter(room_id=room_id, date=date).update(dirty=True)
+
+
+def mark_dirty_many(pairs):
+    """一条 UPDATE 标记多个 (会议室, 日期) 待重算"""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    condition = reduce(
+        operator.or_, (Q(room_id=room_id, date=date) for room_id, date in pairs)
+    )
+    RoomDailyUsage.objects.filter(condition).update(dirty=True)
+
+
+@contextmanager
+def batched_dirty():
+    """
+    块内的 mark_dirty 合并：正常退出时用一条 UPDATE 标记全部 (会议室, 日期)
+    用于批量删除（post_delete 每删除一行触发一次）；可以嵌套，只在最外层标记
+    """
+    outer = getattr(_local, "pending", None) is None
+    if outer:
+        _local.pending = set()
+    try:
+        yield
+    finally:
+        if outer:
+            pending, _local.pending = _local.pending, None
+    if outer:
+        mark_dirty_many(pending)
+
+
+def _totals():
+    return {
+        "days": Count("date", distinct=True),
+        "booked_hours": Sum("booked_hours"),
+        "used_hours": Sum("used_hours"),
+        "canceled_hours": Sum("canceled_hours"),
+        "no_show_hours": Sum("no_show_hours"),
+    }
+
+
+def report(date_from, date_to, room_ids=None):
+    """
+    统计 [date_from, date_to] 的使用情况：按会议室、按星期、按小时
+    占用率 = 预约小时数 / (天数 × ANALYTICS_OPEN_HOURS)
+    """
+    qs = RoomDailyUsage.objects.filter(date__gte=date_from, date__lte=date_to)
+    if room_ids:
+        qs = qs.filter(room_id__in=room_ids)
+
+    open_hours = getattr(settings, "ANALYTICS_OPEN_HOURS", 14)
+    days = (date_to - date_from).days + 1
+
+    by_room = []
+    for row in (
+        qs.values("room_id", "room__name", "room__room_no")
+        .annotate(**_totals())
+        .order_by("room_id")
+    ):
+        row["occupancy_rate"] = round(row["booked_hours"] / (days * open_hours), 4)
+        by_room.append(row)
+
+    # ExtractWeekDay：1 = 周日 … 7 = 周六
+    weekday_days = defaultdict(int)
+    for i in range(days):
+        weekday_days[(date_from + timedelta(days=i)).isoweekday() % 7 + 1] += 1
+    rooms = (
+        MeetingRoom.objects.filter(id__in=room_ids) if room_ids else MeetingRoom.objects
+    ).count() or 1
+    by_weekday = []
+    for row in (
+        qs.annotate(weekday=ExtractWeekDay("date"))
+        .values("weekday")
+        .annotate(**_totals())
+        .order_by("weekday")
+    ):
+        capacity = weekday_days[row["weekday"]] * rooms * open_hours
+        row["occupancy_rate"] = round(row["booked_hours"] / capacity, 4)
+        by_weekday.append(row)
+
+    # 每个小时被预约的 (会议室, 日期) 数，在数据库中对位图逐位求和
+    hours = qs.aggregate(
+        **{f"h{h}": Sum(F("booked_mask").bitrightshift(h).bitand(1)) for h in range(24)}
+    )
+    by_hour = [
+        {
+            "hour": h,
+            "booked": hours[f"h{h}"] or 0,
+            "occupancy_rate": round((hours[f"h{h}"] or 0) / (days * rooms), 4),
+        }
+        for h in range(24)
+    ]
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "days": days,
+        "open_hours": open_hours,
+        "by_room": by_room,
+        "by_weekday": by_weekday,
+        "by_hour": by_hour,
+    }
@@ -0,0 +1,101 @@
+"""
+批量审批
+
+一次取出所选预约及其可能冲突的已通过/已使用预约，在内存中判定冲突
+（包括同一批次内两条待审批预约之间的冲突），最后用 UPDATE 一次写回。
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import Reservation
+
+UPDATE_BATCH_SIZE = 1000
+
+
+def _overlaps(a_start, a_end, b_start, b_end):
+    return a_start < b_end and a_end > b_start
+
+
+def approve_batch(queryset):
+    """
+    审批通过 queryset 中的预约
+    返回 (approved_ids, skipped)，skipped 为 [(id, 原因), ...]
+    """
+    now = timezone.now()
+    today = timezone.localdate()
+    approved_ids, skipped = [], []
+
+    with transaction.atomic():
+        selected = list(
+            queryset.select_for_update()
+            .only(
+                "id",
+                "user_id",
+                "room_id",
+                "date",
+                "start_hour",
+                "end_hour",
+                "status",
+                "topic",
+            )
+            .order_by("date", "start_hour", "id")
+        )
+
+        pending = []
+        for r in selected:
+            if r.status != "PENDING":
+                skipped.append((r.id, f"状态为 {r.get_status_display()}，不是审核中"))
+            elif r.date < today:
+                skipped.append((r.id, "预约日期已过期"))
+            else:
+                pending.append(r)
+
+        if pending:
+            # 已占用的时间段：{(room_id, date): [(start, end, id, 来源)]}
+            taken = defaultdict(list)
+            existing = (
+                Reservation.objects.select_for_update()
+                .filter(
+                    room_id__in={r.room_id for r in pending},
+                    date__in={r.date for r in pending},
+                    status__in=["APPROVED", "USED"],
+                )
+                .values_list("room_id", "date", "start_hour", "end_hour", "id")
+            )
+            for room_id, date, start, end, pk in existing:
+                taken[(room_id, date)].append((start, end, pk, "已通过的预约"))
+
+            for r in pending:
+                slots = taken[(r.room_id, r.date)]
+                clash = next(
+                    (
+                        s
+                        for s in slots
+                        if _overlaps(s[0], s[1], r.start_hour, r.end_hour)
+                    ),
+                    None,
+                )
+                if clash:
+                    skipped.append((r.id, f"与{clash[3]} #{clash[2]} 时间冲突"))
+                    continue
+
+                slots.append((r.start_hour, r.end_hour, r.id, "同批审批的预约"))
+                approved_ids.append(r.id)
+
+        for i in range(0, len(approved_ids), UPDATE_BATCH_SIZE):
+            Reservation.objects.filter(
+                id__in=approved_ids[i : i + UPDATE_BATCH_SIZE]
+            ).update(status="APPROVED", approve_time=now, updated_at=now)
+
+        approved = set(approved_ids)
+        rows = [r for r in pending if r.id in approved]
+        for r in rows:
+            r.status = "APPROVED"
+        events.publish(events.APPROVED, rows)
+
+    skipped.sort()
+    return approved_ids, skipped
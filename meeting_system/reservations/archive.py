@@ -0,0 +1,87 @@
+"""
+历史预约归档
+
+把日期早于保留期、且已处于终态的预约从 reservation 表迁入 reservation_archive 表，
+热表只保留近期与未结束的预约。每批一个小事务：加锁取出一批、写入归档表、从热表删除，
+可以在线运行；中途中断后重新执行即可继续。
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import events
+from .models import ArchivedReservation, Reservation
+
+# 只归档不会再变化的预约；占用中的预约由 run_lifecycle 先流转到终态
+ARCHIVABLE_STATUSES = ["REJECTED", "CANCELED", "EXPIRED", "NO_SHOW", "COMPLETED"]
+
+FIELDS = [
+    "id",
+    "user_id",
+    "room_id",
+    "date",
+    "start_hour",
+    "end_hour",
+    "topic",
+    "status",
+    "reject_reason",
+    "approve_time",
+    "updated_at",
+]
+
+
+def cutoff(days=None):
+    """早于该日期的预约可以归档"""
+    if days is None:
+        days = getattr(settings, "RESERVATION_ARCHIVE_AFTER_DAYS", 180)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def archivable(before):
+    return Reservation.objects.filter(date__lt=before, status__in=ARCHIVABLE_STATUSES)
+
+
+def archive_batch(before, batch_size) -> int:
+    with transaction.atomic():
+        rows = list(
+            archivable(before)
+            .select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            )
+            .order_by("date", "id")
+            .values(*FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        # 重复执行时归档表里可能已有同 id 的行，忽略即可
+        ArchivedReservation.objects.bulk_create(
+            [ArchivedReservation(**row) for row in rows], ignore_conflicts=True
+        )
+        with events.suppressed():
+            Reservation.objects.filter(id__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+def archive(before=None, batch_size=None, pause=0.0, max_batches=None) -> int:
+    """
+    归档 before 之前的历史预约，返回归档条数
+    pause 为两批之间的间隔（秒），给在线业务让出 IO 与锁
+    """
+    before = before or cutoff()
+    batch_size = batch_size or getattr(settings, "RESERVATION_ARCHIVE_BATCH_SIZE", 500)
+
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        done = archive_batch(before, batch_size)
+        total += done
+        batches += 1
+        if done < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return total
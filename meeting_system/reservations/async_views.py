@@ -0,0 +1,191 @@
+"""
+读多写少接口的原生异步版本（ASGI 部署时使用）
+
+与同步视图共用查询构造与校验逻辑，数据库访问换成异步 ORM，视图本身不占用工作线程。
+注意异步 ORM 目前仍把每条查询交给同一个线程（thread_sensitive）依次执行，
+单个请求的查询耗时与同步接口相同，asyncio.gather 多条查询也不会并行。
+可用会议室查询要经过结果缓存与冲突索引（同步实现），整组检查一次放进线程池执行，
+保证与同步接口的结果一致。
+"""
+
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from meeting_system.asyncapi import api_response, async_api_view
+from meeting_system.conditional import aqueryset_version, not_modified, set_validators
+from meeting_system.pubsub import get_broker
+from reservations import availability, events
+from reservations.views import (
+    filter_available_rooms,
+    my_reservations_page,
+    my_reservations_queryset,
+    reservation_source,
+    validate_date_and_time,
+)
+from rooms.catalog import aget_catalog_version
+
+MAX_CHECKS = 20
+MAX_STREAM_DATES = 7
+
+
+def parse_check(data):
+    """解析并校验一组 (date, start_hour, end_hour, people)，不合法时抛出 ValueError"""
+    if not data.get("date"):
+        raise ValueError("日期不能为空")
+
+    try:
+        reserve_date = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        start = int(data.get("start_hour"))
+        end = int(data.get("end_hour"))
+        people = int(data.get("people"))
+    except Exception:
+        raise ValueError("参数格式错误")
+
+    if people <= 0:
+        raise ValueError("参会人数必须大于 0")
+
+    validate_date_and_time(reserve_date, start, end)
+    return reserve_date, start, end, people
+
+
+def check_all(checks) -> list:
+    """
+    逐组查询，与同步接口共用结果缓存与冲突索引，两条路径的结果不会不一致
+    各组依次执行：改用异步 ORM 并发也会在同一个线程上排队，不会更快
+    """
+    return [
+        availability.available_rooms(*check, find_rooms=filter_available_rooms)
+        for check in checks
+    ]
+
+
+@async_api_view(["POST"])
+async def check_available_async_view(request):
+    """
+    POST /api/reservations/async/check/
+    请求体与同步接口相同；也可传 {"checks": [...]} 一次检查多组日期/时段，
+    data 按顺序返回每组的可用会议室
+    """
+    data = request.data
+
+    try:
+        if "checks" in data:
+            if not isinstance(data["checks"], list) or not data["checks"]:
+                raise ValueError("参数格式错误")
+            if len(data["checks"]) > MAX_CHECKS:
+                raise ValueError(f"一次最多检查 {MAX_CHECKS} 组")
+            checks = [parse_check(item) for item in data["checks"]]
+        else:
+            checks = [parse_check(data)]
+    except (ValueError, TypeError, AttributeError) as e:
+        msg = str(e) if isinstance(e, ValueError) else "参数格式错误"
+        return api_response(400, msg)
+
+    try:
+        results = await sync_to_async(check_all)(checks)
+    except Exception:
+        return api_response(500, "服务器内部错误")
+
+    payload = results if "checks" in data else results[0]
+    return api_response(data=payload)
+
+
+@async_api_view(["GET"])
+async def my_reservations_async_view(request):
+    """
+    GET /api/reservations/async/my/
+    参数、分页与 ETag 规则与同步接口相同
+    """
+    user = request.user
+
+    try:
+        records, limit = my_reservations_queryset(user, request.GET)
+    except Exception:
+        return api_response(400, "参数格式错误")
+
+    room_etag = await aget_catalog_version()
+    etag = await aqueryset_version(
+        reservation_source(request.GET).objects.filter(user_id=user.id),
+        extra=f"{request.GET.urlencode()}|{room_etag}",
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_validators(response, etag)
+
+    rows = [r async for r in records[: limit + 1].aiterator()]
+    response = api_response(data=my_reservations_page(rows, limit))
+    return set_validators(response, etag)
+
+
+async def event_stream(channels):
+    """
+    SSE 事件流：先发 ready（客户端此时拉取一次快照），之后只推送增量事件，
+    空闲时定期发送注释行保活。订阅方积压过多时发送 resync 并断开，
+    客户端按 retry 自动重连后重新拉取快照
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(*channels)
+    heartbeat = getattr(settings, "REALTIME_HEARTBEAT", 15)
+
+    try:
+        yield "retry: 3000\nevent: ready\ndata: {}\n\n"
+        while True:
+            message = await subscription.get(timeout=heartbeat)
+            if subscription.lagged:
+                yield "event: resync\ndata: {}\n\n"
+                return
+            if message is None:
+                yield ": ping\n\n"
+                continue
+            data = json.dumps(message, ensure_ascii=False)
+            yield f"event: {message['event']}\ndata: {data}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def sse_response(request, channels):
+    # WSGI 下 Django 会先把异步迭代器完整消费再发送，永不结束的事件流会一直占住
+    # 工作进程并无限缓冲，因此不在 ASGI 下时直接拒绝
+    if not isinstance(request, ASGIRequest):
+        return api_response(501, "实时推送仅在 ASGI 部署下可用", status=501)
+
+    response = StreamingHttpResponse(
+        event_stream(channels), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@async_api_view(["GET"], query_token=True)
+async def date_stream_view(request):
+    """
+    GET /api/reservations/stream/?date=2025-01-01,2025-01-02
+    订阅指定日期的占用变化（最多 7 天）；只能在 ASGI 下使用，WSGI 下返回 501
+    """
+    try:
+        dates = {
+            datetime.strptime(d, "%Y-%m-%d").date()
+            for d in request.GET.get("date", "").split(",")
+        }
+    except ValueError:
+        return api_response(400, "参数格式错误")
+
+    if len(dates) > MAX_STREAM_DATES:
+        return api_response(400, f"最多同时订阅 {MAX_STREAM_DATES} 天")
+
+    return sse_response(request, [events.date_channel(d) for d in sorted(dates)])
+
+
+@async_api_view(["GET"], query_token=True)
+async def my_stream_view(request):
+    """
+    GET /api/reservations/stream/my/
+    订阅当前用户自己预约的状态变化；只能在 ASGI 下使用，WSGI 下返回 501
+    """
+    return sse_response(request, [events.user_channel(request.user.id)])
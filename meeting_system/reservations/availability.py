@@ -0,0 +1,107 @@
+"""
+可用会议室查询结果缓存
+
+同一 (日期, 开始, 结束, 容量档) 的结果在所有用户间共享。缓存键包含：
+  - 该日期的占用位图版本号：任何预约写入都会在提交后递增，整天的旧结果一次全部失效
+  - 会议室列表版本号：会议室增删改、设为不可预约时失效
+人数按 AVAILABILITY_CAPACITY_BUCKETS 向下取档，缓存“容量不小于档位”的会议室，
+返回前再按实际人数过滤。
+
+同一进程内同一个键同时未命中时只有一个线程计算，其余线程阻塞在它的结果上（不轮询缓存），
+计算完成即返回；不同进程各自最多计算一次。
+多进程部署时 AVAILABILITY_CACHE 与版本号所在的 RESERVATION_OCCUPANCY_CACHE 都必须是共享缓存
+（Redis、Memcached 等）：否则其他进程的写入不会使本进程的结果失效，最长会返回
+AVAILABILITY_CACHE_TIMEOUT 秒前的结果。
+"""
+
+import bisect
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rooms.catalog import catalog_version
+from rooms.serializers import MeetingRoomSerializer
+
+from . import occupancy
+
+
+def _cache():
+    return caches[getattr(settings, "AVAILABILITY_CACHE", "default")]
+
+
+def capacity_bucket(people: int) -> int:
+    """不超过 people 的最大档位"""
+    buckets = sorted(getattr(settings, "AVAILABILITY_CAPACITY_BUCKETS", [1]))
+    return buckets[max(bisect.bisect_right(buckets, people) - 1, 0)]
+
+
+def cache_key(date, start: int, end: int, bucket: int) -> str:
+    generation = occupancy.day_versions([date])[date]
+    return (
+        f"reservations:available:{date}:{generation}:{catalog_version()}:"
+        f"{start}:{end}:{bucket}"
+    )
+
+
+# 本进程内正在计算的键：{key: Future}
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _compute(find_rooms, date, start: int, end: int, bucket: int) -> list:
+    rooms = find_rooms(date, start, end, bucket)
+    return [dict(room) for room in MeetingRoomSerializer(rooms, many=True).data]
+
+
+def available_rooms(date, start: int, end: int, people: int, find_rooms) -> list:
+    """
+    可用会议室的序列化结果（与 check/ 接口的 data 相同）
+    find_rooms(date, start, end, people) 未命中缓存时查询可用会议室
+    """
+    cache = _cache()
+    bucket = capacity_bucket(people)
+    key = cache_key(date, start, end, bucket)
+
+    rooms = cache.get(key)
+    if rooms is None:
+        rooms = _single_flight(
+            key, lambda: _compute(find_rooms, date, start, end, bucket)
+        )
+
+    return [room for room in rooms if room["capacity"] >= people]
+
+
+def _single_flight(key, compute) -> list:
+    """
+    第一个未命中的线程计算并写入缓存，其余线程等待它的结果；
+    等待超过 AVAILABILITY_CACHE_WAIT 秒时自行计算，计算出错时各自重试
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    if not leader:
+        try:
+            return future.result(
+                timeout=getattr(settings, "AVAILABILITY_CACHE_WAIT", 2)
+            )
+        except Exception:
+            return compute()
+
+    try:
+        rooms = compute()
+        _cache().set(
+            key, rooms, timeout=getattr(settings, "AVAILABILITY_CACHE_TIMEOUT", 60)
+        )
+        future.set_result(rooms)
+        return rooms
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
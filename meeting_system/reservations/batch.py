@@ -0,0 +1,200 @@
+"""
+批量 / 周期预约
+
+所有时间段的冲突检查只用一条查询取出涉及日期的占用位图，在内存中判定，
+预约用 bulk_create 一次写入，时段行由唯一约束兜底，最后每个日期一条 UPDATE 更新位图。
+"""
+
+import operator
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from . import events, occupancy
+from .models import Reservation, ReservationSlot, RoomOccupancy
+
+# 单次请求最多展开的时间段数（足够覆盖一年的周会）
+MAX_OCCURRENCES = 100
+
+FREQ_DAYS = {"daily": 1, "weekly": 7}
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def expand_recurrence(repeat: dict, start: int, end: int) -> list:
+    """
+    把重复规则展开为 [(date, start, end), ...]
+    repeat: {"freq": "daily" | "weekly", "date": 首次日期, "until": 截止日期 | "count": 次数}
+    """
+    freq = repeat.get("freq")
+    if freq not in FREQ_DAYS:
+        raise ValueError("重复频率只能是 daily 或 weekly")
+
+    first = parse_date(repeat["date"])
+    until = parse_date(repeat["until"]) if repeat.get("until") else None
+    count = int(repeat["count"]) if repeat.get("count") else None
+    if until is None and count is None:
+        raise ValueError("重复规则需指定截止日期或次数")
+
+    step = timedelta(days=FREQ_DAYS[freq])
+    slots = []
+    day = first
+    while (until is None or day <= until) and (count is None or len(slots) < count):
+        if len(slots) >= MAX_OCCURRENCES:
+            raise ValueError(f"单次最多预约 {MAX_OCCURRENCES} 个时间段")
+        slots.append((day, start, end))
+        day += step
+    return slots
+
+
+def parse_slots(items: list) -> list:
+    """显式时间段列表 [{"date", "start_hour", "end_hour"}, ...]"""
+    if len(items) > MAX_OCCURRENCES:
+        raise ValueError(f"单次最多预约 {MAX_OCCURRENCES} 个时间段")
+    return [
+        (parse_date(item["date"]), int(item["start_hour"]), int(item["end_hour"]))
+        for item in items
+    ]
+
+
+def _rejected(results, accepted, all_or_nothing) -> bool:
+    """没有可创建的时间段，或整批模式下有时间段失败：回滚并返回 True"""
+    if accepted and not (all_or_nothing and len(accepted) < len(results)):
+        return False
+    transaction.set_rollback(True)
+    if all_or_nothing:
+        for r in accepted:
+            r.update(ok=False, msg="其他时间段失败，未创建")
+    return True
+
+
+def _claim_slots(room, rows):
+    ReservationSlot.objects.bulk_create(
+        ReservationSlot(room=room, date=r["date"], hour=hour)
+        for r in rows
+        for hour in range(r["start_hour"], r["end_hour"])
+    )
+
+
+def create_batch(user, room, slots, topic, validate, all_or_nothing=True):
+    """
+    为同一会议室批量创建预约
+    slots: [(date, start, end), ...]；validate(date, start, end) 不合法时抛 ValueError
+    返回 (created, results)，results 与 slots 一一对应：
+    {"date", "start_hour", "end_hour", "ok", "msg", "id"}，id 为新建预约的主键
+
+    加锁顺序与 book_room 相同（RESERVATION_BOOKING_MODE）：
+      - "lock"：先锁涉及日期的位图行，再插入时段行
+      - "slot"：不加锁读位图，先插入时段行，最后按位或更新位图
+    """
+    mode = getattr(settings, "RESERVATION_BOOKING_MODE", "lock")
+
+    results = []
+    for date, start, end in slots:
+        result = {
+            "date": date,
+            "start_hour": start,
+            "end_hour": end,
+            "ok": True,
+            "msg": "ok",
+            "id": None,
+        }
+        try:
+            validate(date, start, end)
+        except ValueError as e:
+            result.update(ok=False, msg=str(e))
+        results.append(result)
+
+    # 在事务外幂等补齐缺失的位图行（见 occupancy.lock_day）
+    dates = {r["date"] for r in results if r["ok"]}
+    RoomOccupancy.objects.bulk_create(
+        [RoomOccupancy(room=room, date=date) for date in dates],
+        ignore_conflicts=True,
+    )
+
+    with transaction.atomic():
+        days = RoomOccupancy.objects.filter(room=room, date__in=dates)
+        if mode != "slot":
+            days = days.select_for_update()
+        # slot 模式不加锁读：只用于给出已提交占用的失败原因，
+        # 并发写入由时段表唯一约束拒绝
+        masks = dict(days.values_list("date", "mask"))
+
+        # 内存中判定冲突；本批已接受的时间段同样计入位图，防止批内互相重叠
+        for r in results:
+            if not r["ok"]:
+                continue
+            bits = occupancy.hours_mask(r["start_hour"], r["end_hour"])
+            if masks.get(r["date"], 0) & bits:
+                r.update(ok=False, msg="该时间段已被占用")
+                continue
+            masks[r["date"]] = masks.get(r["date"], 0) | bits
+
+        accepted = [r for r in results if r["ok"]]
+        if _rejected(results, accepted, all_or_nothing):
+            return 0, results
+
+        # 按 (日期, 开始时间) 顺序插入时段行，并发事务加锁顺序一致；
+        # 已被其他事务（包括尚未提交的）占用的时间段由唯一约束拒绝，
+        # 这时再逐条插入，找出被占用的时间段
+        accepted.sort(key=lambda r: (r["date"], r["start_hour"]))
+        try:
+            with transaction.atomic():
+                _claim_slots(room, accepted)
+        except IntegrityError:
+            for r in accepted:
+                try:
+                    with transaction.atomic():
+                        _claim_slots(room, [r])
+                except IntegrityError:
+                    r.update(ok=False, msg="该时间段已被占用")
+                    if all_or_nothing:
+                        break
+
+        accepted = [r for r in accepted if r["ok"]]
+        if _rejected(results, accepted, all_or_nothing):
+            return 0, results
+
+        Reservation.objects.bulk_create(
+            Reservation(
+                user_id=user.id,
+                room=room,
+                date=r["date"],
+                start_hour=r["start_hour"],
+                end_hour=r["end_hour"],
+                topic=topic,
+                status="PENDING",
+            )
+            for r in accepted
+        )
+        # MySQL 的 bulk_create 不回填主键，按 (日期, 开始时间) 取回本批新建的预约；
+        # 这些时间段已在本事务中占用，不会匹配到其他占用中的预约
+        reservations = list(
+            Reservation.objects.filter(
+                room=room, user_id=user.id, status="PENDING"
+            ).filter(
+                reduce(
+                    operator.or_,
+                    (Q(date=r["date"], start_hour=r["start_hour"]) for r in accepted),
+                )
+            )
+        )
+        ids = {(x.date, x.start_hour): x.id for x in reservations}
+        for r in accepted:
+            r["id"] = ids[(r["date"], r["start_hour"])]
+
+        # 位图最后按位或，每个日期一条 UPDATE
+        bits = defaultdict(int)
+        for r in accepted:
+            bits[r["date"]] |= occupancy.hours_mask(r["start_hour"], r["end_hour"])
+        for date in sorted(bits):
+            occupancy.add_bits(room.id, date, bits[date])
+        events.publish(events.CREATED, reservations)
+
+    return len(accepted), results
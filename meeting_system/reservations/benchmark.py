@@ -0,0 +1,165 @@
+"""
+接口压测工具
+
+生成可配置规模的数据集，通过 Django 测试客户端串行或多线程调用接口，
+统计延迟分位数、吞吐量与每请求查询次数。
+"""
+
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from users.tokens import UserRefreshToken
+
+from . import occupancy
+from .models import Reservation
+
+from rooms.models import MeetingRoom
+
+BENCH_PASSWORD = "bench-password"
+
+
+def seed_dataset(rooms=100, users=200, reservations=5000, days=30, seed=0):
+    """
+    生成 rooms 个会议室、users 个用户、最多 reservations 条预约（分布在今天起 days 天内）
+    冲突的随机时间段直接跳过，返回 (room_ids, users)
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+
+    MeetingRoom.objects.bulk_create(
+        MeetingRoom(
+            name=f"bench-{i}",
+            room_no=str(100 + i),
+            capacity=rng.choice([4, 8, 12, 20, 50]),
+            photo=f"rooms/{i}.jpg",
+        )
+        for i in range(rooms)
+    )
+    room_ids = list(
+        MeetingRoom.objects.filter(name__startswith="bench-").values_list(
+            "id", flat=True
+        )
+    )
+
+    # 所有用户共用一个密码哈希，避免生成数据时反复计算 PBKDF2
+    password = make_password(BENCH_PASSWORD)
+    User.objects.bulk_create(
+        User(username=f"bench_user_{i}", password=password) for i in range(users)
+    )
+    user_objs = list(User.objects.filter(username__startswith="bench_user_"))
+
+    taken = {}
+    rows = []
+    for _ in range(reservations):
+        room_id = rng.choice(room_ids)
+        date = today + timedelta(days=rng.randrange(days))
+        start = rng.randrange(8, 20)
+        end = min(24, start + rng.randint(1, 3))
+        bits = occupancy.hours_mask(start, end)
+        key = (room_id, date)
+        if taken.get(key, 0) & bits:
+            continue
+        taken[key] = taken.get(key, 0) | bits
+        rows.append(
+            Reservation(
+                user=rng.choice(user_objs),
+                room_id=room_id,
+                date=date,
+                start_hour=start,
+                end_hour=end,
+                topic="bench",
+                status=rng.choice(["PENDING", "APPROVED", "USED"]),
+            )
+        )
+    Reservation.objects.bulk_create(rows, batch_size=1000)
+    occupancy.repair(occupancy.diff(today))
+
+    return room_ids, user_objs
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(latencies, wall, queries=None, errors=0):
+    """延迟单位毫秒"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if count else 0.0,
+        "throughput_rps": round(count / wall, 1) if wall else 0.0,
+        "queries_per_request": (
+            round(queries / count, 2) if queries is not None and count else None
+        ),
+    }
+
+
+def auth_header(user) -> dict:
+    """JWT 请求头，请求会走真实的认证流程"""
+    return {"HTTP_AUTHORIZATION": f"Bearer {UserRefreshToken.for_user(user).access_token}"}
+
+
+def run_serial(make_request, requests):
+    """串行执行，统计每请求查询次数"""
+    latencies, errors, queries = [], 0, [0]
+
+    def count_queries(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    begin = time.perf_counter()
+    with connection.execute_wrapper(count_queries):
+        for i in range(requests):
+            start = time.perf_counter()
+            if not make_request(i):
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - begin
+    return summarize(latencies, wall, queries[0], errors)
+
+
+def run_concurrent(make_request, requests, concurrency):
+    """多线程执行，每个线程使用独立的数据库连接"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                start = time.perf_counter()
+                ok = make_request(i)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        errors[0] += 1
+        finally:
+            connection.close()
+
+    begin = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - begin
+    return summarize(latencies, wall, errors=errors[0])
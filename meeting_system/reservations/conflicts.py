@@ -0,0 +1,178 @@
+"""
+预约冲突检查
+
+后台表单与用户接口共用同一套规则：
+同一会议室、同一天、处于占用状态（ACTIVE_STATUSES）的预约，时间段 [start, end) 有重叠即冲突。
+
+只读的可用性查询通过 ConflictIndex 回答，实现由 RESERVATION_CONFLICT_INDEX 指定：
+  - DatabaseIndex：每次查询占用位图表
+  - MemoryIndex：进程内保存近期每天各会议室的位图，按日期版本号判断是否需要重新加载
+预约的写入（加锁检查、审批）始终以数据库为准，不经过索引。
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import occupancy
+from .models import Reservation
+
+
+def validate_hours(start: int, end: int):
+    """小时范围与先后顺序，不合法时抛 ValueError"""
+    if start < 0 or end > 24:
+        raise ValueError("小时必须在 0-24 范围内")
+
+    if start >= end:
+        raise ValueError("结束时间必须晚于开始时间")
+
+
+def has_conflict(room_id: int, date, start: int, end: int) -> bool:
+    """只判断是否冲突：查会议室当天的占用位图，一次位与"""
+    return not get_index().is_free(room_id, date, start, end)
+
+
+def overlapping(room_id: int, date, start: int, end: int, exclude_id=None):
+    """与 [start, end) 重叠的占用中预约"""
+    queryset = Reservation.objects.filter(
+        room_id=room_id,
+        date=date,
+        status__in=occupancy.ACTIVE_STATUSES,
+        start_hour__lt=end,
+        end_hour__gt=start,
+    )
+    if exclude_id is not None:
+        queryset = queryset.exclude(id=exclude_id)
+    return queryset
+
+
+def find_conflict(room_id: int, date, start: int, end: int, exclude_id=None):
+    """
+    返回最早的一条冲突预约（连同预约人，一次查询），无冲突返回 None
+    修改已有预约时用 exclude_id 排除它自己
+    """
+    return (
+        overlapping(room_id, date, start, end, exclude_id)
+        .select_related("user")
+        .only("id", "start_hour", "end_hour", "user__username")
+        .order_by("start_hour", "id")
+        .first()
+    )
+
+
+def describe(conflict) -> str:
+    return (
+        f"时间冲突：{conflict.user.username} "
+        f"{conflict.start_hour}:00-{conflict.end_hour}:00"
+    )
+
+
+class ConflictIndex(ABC):
+    """占用情况的只读索引；实现至少提供 day_masks，缺少时实例化即报错"""
+
+    @abstractmethod
+    def day_masks(self, date, room_ids=None) -> dict:
+        """某天各会议室的位图：{room_id: mask}，没有占用的会议室不出现"""
+
+    def is_free(self, room_id: int, date, start: int, end: int) -> bool:
+        mask = self.day_masks(date, [room_id]).get(room_id, 0)
+        return not mask & occupancy.hours_mask(start, end)
+
+    def warm(self):
+        """预先加载近期数据，默认无需预热"""
+
+
+class DatabaseIndex(ConflictIndex):
+    """每次查询占用位图表"""
+
+    def day_masks(self, date, room_ids=None) -> dict:
+        return occupancy.day_masks(date, room_ids)
+
+    def is_free(self, room_id: int, date, start: int, end: int) -> bool:
+        return occupancy.is_free(room_id, date, start, end)
+
+
+class MemoryIndex(ConflictIndex):
+    """
+    进程内索引：{date: (版本号, {room_id: mask})}
+    一天只有 24 个整点，每个 (会议室, 日期) 的区间集合就是一个位图，重叠判断是一次位与。
+    每次读取先比对该日期在共享缓存中的版本号，不一致时整天重新加载（一次查询），
+    否则不访问数据库；启动后预热今天起 RESERVATION_CONFLICT_INDEX_WARM_DAYS 天。
+    最多保存 RESERVATION_CONFLICT_INDEX_MAX_DAYS 天，超出时淘汰最久未访问的日期，
+    任意请求远期日期也不会让内存无限增长。
+    """
+
+    def __init__(self):
+        self.warm_days = getattr(settings, "RESERVATION_CONFLICT_INDEX_WARM_DAYS", 14)
+        self.max_days = max(
+            getattr(settings, "RESERVATION_CONFLICT_INDEX_MAX_DAYS", 60), self.warm_days
+        )
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+
+    def warm(self):
+        today = timezone.localdate()
+        dates = [today + timedelta(days=i) for i in range(self.warm_days)]
+        # 先读版本号再读位图：期间若有写入，下次读取时版本号不一致会重新加载
+        versions = occupancy.day_versions(dates)
+        masks = {date: {} for date in dates}
+        for (room_id, date), mask in occupancy.range_masks(dates[0], dates[-1]).items():
+            masks[date][room_id] = mask
+
+        with self._lock:
+            self._days = OrderedDict(
+                (date, (versions[date], masks[date])) for date in dates
+            )
+
+    def _get(self, date, version):
+        with self._lock:
+            entry = self._days.get(date)
+            if entry and entry[0] == version:
+                self._days.move_to_end(date)
+                return entry[1]
+        return None
+
+    def _load(self, date, version) -> dict:
+        masks = occupancy.day_masks(date)
+        with self._lock:
+            self._days[date] = (version, masks)
+            self._days.move_to_end(date)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+        return masks
+
+    def day_masks(self, date, room_ids=None) -> dict:
+        version = occupancy.day_versions([date])[date]
+        masks = self._get(date, version)
+        if masks is None:
+            masks = self._load(date, version)
+        if room_ids is None:
+            return dict(masks)
+        return {room_id: masks[room_id] for room_id in room_ids if room_id in masks}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> ConflictIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                cls = import_string(
+                    getattr(
+                        settings,
+                        "RESERVATION_CONFLICT_INDEX",
+                        "reservations.conflicts.DatabaseIndex",
+                    )
+                )
+                index = cls()
+                index.warm()
+                _index = index
+    return _index
@@ -0,0 +1,115 @@
+"""
+预约变动事件
+
+预约被创建、取消、审批、驳回、确认使用、删除或由定时任务流转后，向两个频道推送增量事件：
+- date:<YYYY-MM-DD>：该日期的占用变化，只含会议室与时间段，不含预约人和主题
+- user:<id>：预约人自己的预约状态变化
+
+事件在事务提交后才发布，回滚的修改不会被推送。
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from meeting_system.pubsub import get_broker
+
+CREATED = "created"
+CANCELED = "canceled"
+APPROVED = "approved"
+REJECTED = "rejected"
+USED = "used"
+EXPIRED = "expired"
+NO_SHOW = "no_show"
+COMPLETED = "completed"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# 状态变更对应的事件
+STATUS_EVENTS = {
+    "PENDING": CREATED,
+    "APPROVED": APPROVED,
+    "REJECTED": REJECTED,
+    "CANCELED": CANCELED,
+    "USED": USED,
+    "EXPIRED": EXPIRED,
+    "NO_SHOW": NO_SHOW,
+    "COMPLETED": COMPLETED,
+}
+
+
+_local = threading.local()
+
+
+@contextmanager
+def suppressed():
+    """块内不发布事件（如归档：数据只是换表存放，对客户端不可见）"""
+    previous = getattr(_local, "suppressed", False)
+    _local.suppressed = True
+    try:
+        yield
+    finally:
+        _local.suppressed = previous
+
+
+def is_suppressed() -> bool:
+    return getattr(_local, "suppressed", False)
+
+
+def date_channel(date) -> str:
+    return f"date:{date.isoformat()}"
+
+
+def user_channel(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def _payloads(kind, r):
+    slot = {
+        "event": kind,
+        "id": r.id,
+        "room_id": r.room_id,
+        "date": r.date.isoformat(),
+        "start_hour": r.start_hour,
+        "end_hour": r.end_hour,
+        "status": r.status,
+    }
+    return slot, {**slot, "topic": r.topic}
+
+
+def publish(kind, reservations, previous=None):
+    """
+    reservations 为 Reservation 实例，需含 user_id、room_id、date、时间段、status、topic
+    previous 为修改前的 (room_id, date, start, end)，仅用于单条预约改期，
+    事件会同时推送到原日期的频道
+    """
+    if is_suppressed():
+        return
+
+    messages = []
+    for r in reservations:
+        slot, own = _payloads(kind, r)
+        if previous is not None:
+            room_id, date, start, end = previous
+            moved = {
+                "room_id": room_id,
+                "date": date.isoformat(),
+                "start_hour": start,
+                "end_hour": end,
+            }
+            slot["previous"] = own["previous"] = moved
+            if date != r.date:
+                messages.append((date_channel(date), slot))
+        messages.append((date_channel(r.date), slot))
+        messages.append((user_channel(r.user_id), own))
+
+    if not messages:
+        return
+
+    def send():
+        broker = get_broker()
+        for channel, message in messages:
+            broker.publish(channel, message)
+
+    transaction.on_commit(send)
@@ -0,0 +1,49 @@
+"""
+会议室占用网格
+
+一次取出日期范围内所有会议室的占用位图（位图表本身就是按 (room, date) 聚合好的预约），
+按会议室逐条流式输出，周视图下几百个会议室也只需一次请求。
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import occupancy
+
+from rooms.models import MeetingRoom
+
+# 单次请求最多查询的天数
+MAX_GRID_DAYS = 31
+
+
+def iter_grid(date_from, days: int, people: int = 0, encoding: str = "mask"):
+    """
+    逐段生成 JSON：
+    {"code": 0, "msg": "ok", "data": {"dates": [...], "rooms": [
+        {"id", "name", "room_no", "capacity", "busy": [每天的位图或区间列表]}, ...]}}
+    """
+    dates = [date_from + timedelta(days=i) for i in range(days)]
+    masks = occupancy.range_masks(dates[0], dates[-1])
+
+    rooms = (
+        MeetingRoom.objects.filter(capacity__gte=people, is_available=True)
+        .order_by("id")
+        .values("id", "name", "room_no", "capacity")
+    )
+
+    head = {"dates": dates}
+    yield '{"code": 0, "msg": "ok", "data": '
+    yield json.dumps(head, cls=DjangoJSONEncoder)[:-1] + ', "rooms": ['
+
+    for i, room in enumerate(rooms.iterator(chunk_size=500)):
+        day_masks = [masks.get((room["id"], d), 0) for d in dates]
+        room["busy"] = (
+            [occupancy.mask_runs(m) for m in day_masks]
+            if encoding == "runs"
+            else day_masks
+        )
+        yield ("," if i else "") + json.dumps(room, ensure_ascii=False)
+
+    yield "]}}"
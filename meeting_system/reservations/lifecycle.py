@@ -0,0 +1,110 @@
+"""
+预约生命周期流转
+
+由 run_lifecycle 命令定时执行，按时间推进预约状态并释放占用：
+- 过期：第一个小时已结束仍未审批的 PENDING → EXPIRED
+  （允许预约当前这个小时，不能一开始就过期，否则审批前就被下一轮清理掉）
+- 未使用：开始后超过宽限期仍未确认使用的 APPROVED → NO_SHOW
+- 结束：结束时间已过的 USED → COMPLETED
+
+三者都会离开占用状态，冲突检查、审批等热点查询涉及的行因此保持在少量。
+每批取出一定数量的行加锁，一条 UPDATE 写回并释放位图，跳过被其他事务锁住的行
+（如用户正在取消），留到下一轮处理。
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import events, occupancy
+from .models import Reservation
+
+
+def _started_before(moment):
+    """开始时间不晚于 moment（整点开始，start_hour <= moment.hour 即已开始）"""
+    return Q(date__lt=moment.date()) | Q(
+        date=moment.date(), start_hour__lte=moment.hour
+    )
+
+
+def _first_hour_ended(moment):
+    """第一个小时在 moment 之前已结束（start_hour < moment.hour）"""
+    return Q(date__lt=moment.date()) | Q(date=moment.date(), start_hour__lt=moment.hour)
+
+
+def _ended_before(moment):
+    return Q(date__lt=moment.date()) | Q(date=moment.date(), end_hour__lte=moment.hour)
+
+
+def rules(now=None):
+    """[(名称, 原状态, 条件, 新状态), ...]"""
+    now = timezone.localtime(now)
+    grace = timedelta(
+        minutes=getattr(settings, "RESERVATION_NO_SHOW_GRACE_MINUTES", 15)
+    )
+    return [
+        ("expire", "PENDING", _first_hour_ended(now), "EXPIRED"),
+        ("no_show", "APPROVED", _started_before(now - grace), "NO_SHOW"),
+        ("complete", "USED", _ended_before(now), "COMPLETED"),
+    ]
+
+
+def _sweep_batch(status_from, condition, status_to, batch_size, now):
+    with transaction.atomic():
+        rows = list(
+            Reservation.objects.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked
+            )
+            .filter(condition, status=status_from)
+            .only(
+                "id",
+                "user_id",
+                "room_id",
+                "date",
+                "start_hour",
+                "end_hour",
+                "topic",
+            )
+            .order_by("date", "start_hour", "id")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        Reservation.objects.filter(id__in=[r.id for r in rows]).update(
+            status=status_to, updated_at=now
+        )
+        occupancy.release_many(
+            [(r.room_id, r.date, r.start_hour, r.end_hour) for r in rows]
+        )
+        for r in rows:
+            r.status = status_to
+        events.publish(events.STATUS_EVENTS[status_to], rows)
+    return len(rows)
+
+
+def sweep(now=None, batch_size=None, dry_run=False) -> dict:
+    """执行一轮流转，返回 {名称: 处理条数}；dry_run 只统计不修改"""
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(
+        settings, "RESERVATION_LIFECYCLE_BATCH_SIZE", 500
+    )
+
+    counts = {}
+    for name, status_from, condition, status_to in rules(now):
+        if dry_run:
+            counts[name] = Reservation.objects.filter(
+                condition, status=status_from
+            ).count()
+            continue
+
+        total = 0
+        while True:
+            done = _sweep_batch(status_from, condition, status_to, batch_size, now)
+            total += done
+            if done < batch_size:
+                break
+        counts[name] = total
+    return counts
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from reservations import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "将早于保留期（默认 RESERVATION_ARCHIVE_AFTER_DAYS 天）且已结束流程的预约"
+        "分批迁入归档表，每批一个小事务，可在线运行"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="保留最近多少天")
+        parser.add_argument("--batch-size", type=int, default=None, help="每批条数")
+        parser.add_argument(
+            "--pause", type=float, default=0.0, help="两批之间暂停的秒数"
+        )
+        parser.add_argument(
+            "--max-batches", type=int, default=None, help="最多处理的批数"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="只统计不修改")
+
+    def handle(self, *args, **options):
+        before = archive.cutoff(options["days"])
+
+        if options["dry_run"]:
+            count = archive.archivable(before).count()
+            self.stdout.write(f"[dry-run] {before} 之前可归档 {count} 条")
+            return
+
+        total = archive.archive(
+            before,
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"已归档 {before} 之前的预约 {total} 条"))
@@ -0,0 +1,233 @@
+import json
+import random
+import subprocess
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reservations.benchmark import (
+    BENCH_PASSWORD,
+    auth_header,
+    run_concurrent,
+    run_serial,
+    seed_dataset,
+)
+
+ENDPOINTS = ["check", "create", "my", "rooms_list", "login"]
+
+# 与基线对比时检查的指标
+COMPARED_METRICS = ["p50_ms", "p99_ms", "queries_per_request"]
+
+
+class Command(BaseCommand):
+    help = (
+        "在独立的测试数据库中生成数据集并压测预约相关接口，"
+        "输出延迟分位数、吞吐量与每请求查询次数，可保存为 JSON 并与基线对比"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=100, help="会议室数量")
+        parser.add_argument("--users", type=int, default=200, help="用户数量")
+        parser.add_argument("--reservations", type=int, default=5000, help="预约数量")
+        parser.add_argument("--days", type=int, default=30, help="预约分布的天数")
+        parser.add_argument(
+            "--requests", type=int, default=200, help="每个接口的请求数"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="并发模式的线程数，0 表示只跑串行",
+        )
+        parser.add_argument(
+            "--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS
+        )
+        parser.add_argument("--seed", type=int, default=0, help="随机种子")
+        parser.add_argument("--output", help="结果 JSON 的保存路径")
+        parser.add_argument("--compare", help="基线结果 JSON，用于检测性能回退")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="允许的回退比例，超过则以非零状态退出（默认 0.2 即 20%%）",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true", help="保留测试数据库（仍会重新生成数据）"
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, keepdb=options["keepdb"])
+        try:
+            report = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        self._print(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"结果已保存到 {options['output']}")
+
+        if options["compare"]:
+            self._compare(report, options["compare"], options["threshold"])
+
+    # ---- 压测 ----
+    def _run(self, options):
+        room_ids, users = seed_dataset(
+            rooms=options["rooms"],
+            users=options["users"],
+            reservations=options["reservations"],
+            days=options["days"],
+            seed=options["seed"],
+        )
+        headers = [auth_header(u) for u in users]
+        today = timezone.localdate()
+        rng = random.Random(options["seed"])
+
+        def slot():
+            date = today + timedelta(days=rng.randrange(1, options["days"]))
+            start = rng.randrange(8, 20)
+            return date.isoformat(), start, start + rng.randint(1, 3)
+
+        def ok(response):
+            return response.status_code in (200, 304) and response.json()["code"] in (
+                0,
+                409,
+            )
+
+        def check(i):
+            date, start, end = slot()
+            body = {"date": date, "start_hour": start, "end_hour": end, "people": 4}
+            return ok(
+                APIClient().post(
+                    "/api/reservations/check/",
+                    body,
+                    format="json",
+                    **headers[i % len(headers)],
+                )
+            )
+
+        def create(i):
+            date, start, end = slot()
+            body = {
+                "room_id": rng.choice(room_ids),
+                "date": date,
+                "start_hour": start,
+                "end_hour": end,
+                "people": 1,
+                "topic": "bench",
+            }
+            return ok(
+                APIClient().post(
+                    "/api/reservations/create/",
+                    body,
+                    format="json",
+                    **headers[i % len(headers)],
+                )
+            )
+
+        def my(i):
+            return ok(
+                APIClient().get("/api/reservations/my/", **headers[i % len(headers)])
+            )
+
+        def rooms_list(i):
+            return ok(APIClient().get("/api/rooms/list/", **headers[i % len(headers)]))
+
+        def login(i):
+            body = {
+                "username": users[i % len(users)].username,
+                "password": BENCH_PASSWORD,
+            }
+            return ok(APIClient().post("/api/auth/login/", body, format="json"))
+
+        funcs = {
+            "check": check,
+            "create": create,
+            "my": my,
+            "rooms_list": rooms_list,
+            "login": login,
+        }
+
+        results = {}
+        for name in options["endpoints"]:
+            results[name] = {"serial": run_serial(funcs[name], options["requests"])}
+            if options["concurrency"] > 0:
+                results[name]["concurrent"] = run_concurrent(
+                    funcs[name], options["requests"], options["concurrency"]
+                )
+
+        return {
+            "meta": {
+                "commit": self._commit(),
+                "timestamp": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "dataset": {
+                    key: options[key]
+                    for key in ("rooms", "users", "reservations", "days")
+                },
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+            },
+            "results": results,
+        }
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except Exception:
+            return None
+
+    # ---- 输出 ----
+    def _print(self, report):
+        self.stdout.write(
+            f"{'endpoint':<11} {'mode':<10} {'n':>5} {'err':>4} {'p50':>8} "
+            f"{'p90':>8} {'p99':>8} {'rps':>8} {'queries':>8}"
+        )
+        for name, modes in report["results"].items():
+            for mode, r in modes.items():
+                queries = r["queries_per_request"]
+                self.stdout.write(
+                    f"{name:<11} {mode:<10} {r['count']:>5} {r['errors']:>4} "
+                    f"{r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+                    f"{r['throughput_rps']:>8.1f} {'-' if queries is None else queries:>8}"
+                )
+
+    def _compare(self, report, path, threshold):
+        try:
+            with open(path, encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"无法读取基线文件：{e}")
+
+        regressions = []
+        for name, modes in report["results"].items():
+            for mode, current in modes.items():
+                base = baseline.get("results", {}).get(name, {}).get(mode)
+                if not base:
+                    continue
+                for metric in COMPARED_METRICS:
+                    old, new = base.get(metric), current.get(metric)
+                    if old and new is not None and new > old * (1 + threshold):
+                        regressions.append(f"{name}/{mode} {metric}: {old} → {new}")
+
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            raise CommandError(f"与基线 {path} 相比有 {len(regressions)} 项指标回退")
+        self.stdout.write(self.style.SUCCESS(f"与基线 {path} 相比没有回退"))
@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from reservations import occupancy
+from reservations.models import Reservation, RoomOccupancy
+from reservations.views import filter_available_rooms
+from rooms.models import MeetingRoom
+
+
+def legacy_filter_available_rooms(date, start, end, people):
+    """旧实现：逐个会议室范围扫描预约表（1 + N 次查询），仅用于对比"""
+    candidates = MeetingRoom.objects.filter(capacity__gte=people, is_available=True)
+    return [
+        room
+        for room in candidates
+        if not Reservation.objects.filter(
+            room_id=room.id,
+            date=date,
+            status__in=occupancy.ACTIVE_STATUSES,
+            start_hour__lt=end,
+            end_hour__gt=start,
+        ).exists()
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "在独立的测试数据库中对比可用会议室查询新旧实现的查询次数与耗时"
+        "（每组数据在事务中生成并回滚）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rooms",
+            type=int,
+            nargs="+",
+            default=[10, 100, 500],
+            help="要测试的会议室数量，可传多个",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="每组重复次数")
+        parser.add_argument("--keepdb", action="store_true", help="保留测试数据库")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, keepdb=options["keepdb"])
+        try:
+            self._run(options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+    def _run(self, options):
+        date = timezone.localdate() + timedelta(days=1)
+
+        self.stdout.write(
+            f"{'rooms':>6} {'impl':>8} {'queries':>8} {'avg_ms':>9} {'free':>6}"
+        )
+        for n in options["rooms"]:
+            with transaction.atomic():
+                self._seed(n, date)
+                for name, func in (
+                    ("legacy", legacy_filter_available_rooms),
+                    ("engine", filter_available_rooms),
+                ):
+                    queries, avg_ms, free = self._measure(func, date, options["repeat"])
+                    self.stdout.write(
+                        f"{n:>6} {name:>8} {queries:>8} {avg_ms:>9.2f} {free:>6}"
+                    )
+                transaction.set_rollback(True)
+
+    def _seed(self, n, date):
+        user = User.objects.create(username=f"bench_availability_{n}")
+        MeetingRoom.objects.bulk_create(
+            MeetingRoom(name=f"bench-{i}", capacity=10 + i % 20) for i in range(n)
+        )
+        # MySQL 的 bulk_create 不回填主键，重新读取
+        rooms = list(
+            MeetingRoom.objects.filter(name__startswith="bench-").order_by("id")
+        )
+        # 每隔一个会议室放一条与 9-11 点重叠的预约
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=user,
+                room=room,
+                date=date,
+                start_hour=10,
+                end_hour=12,
+                status="APPROVED",
+            )
+            for room in rooms[::2]
+        )
+        RoomOccupancy.objects.bulk_create(
+            RoomOccupancy(room=room, date=date, mask=occupancy.hours_mask(10, 12))
+            for room in rooms[::2]
+        )
+
+    def _measure(self, func, date, repeat):
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(repeat):
+                begin = time.perf_counter()
+                rooms = func(date, 9, 11, 5)
+                elapsed += time.perf_counter() - begin
+        return len(ctx.captured_queries) // repeat, elapsed * 1000 / repeat, len(rooms)
@@ -0,0 +1,73 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from reservations.models import Reservation
+from rooms.models import MeetingRoom
+
+
+class Command(BaseCommand):
+    help = "对比完整响应（200）与条件请求命中（304）的耗时、查询次数与响应体大小"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=200, help="会议室数量")
+        parser.add_argument(
+            "--reservations", type=int, default=500, help="该用户的预约数"
+        )
+        parser.add_argument("--repeat", type=int, default=50, help="每组请求次数")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options["rooms"], options["reservations"])
+            client = APIClient(HTTP_HOST="localhost")
+            client.force_authenticate(user)
+
+            self.stdout.write(
+                f"{'endpoint':<34} {'status':>6} {'queries':>8} {'avg_ms':>8} {'bytes':>8}"
+            )
+            for url in ("/api/rooms/list/", "/api/reservations/my/?limit=100"):
+                etag = client.get(url)["ETag"]
+                for headers in ({}, {"HTTP_IF_NONE_MATCH": etag}):
+                    self._measure(client, url, headers, options["repeat"])
+
+            transaction.set_rollback(True)
+
+    def _seed(self, n_rooms, n_reservations):
+        user = User.objects.create(username="bench_conditional")
+        rooms = MeetingRoom.objects.bulk_create(
+            MeetingRoom(name=f"bench-{i}", capacity=10, photo=f"rooms/{i}.jpg")
+            for i in range(n_rooms)
+        )
+        today = timezone.localdate()
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=user,
+                room=rooms[i % n_rooms],
+                date=today - timedelta(days=i // 8),
+                start_hour=8 + i % 8,
+                end_hour=9 + i % 8,
+                status="USED",
+            )
+            for i in range(n_reservations)
+        )
+        return user
+
+    def _measure(self, client, url, headers, repeat):
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(repeat):
+                begin = time.perf_counter()
+                response = client.get(url, **headers)
+                elapsed += time.perf_counter() - begin
+
+        self.stdout.write(
+            f"{url:<34} {response.status_code:>6} "
+            f"{len(ctx.captured_queries) // repeat:>8} "
+            f"{elapsed * 1000 / repeat:>8.2f} {len(response.content):>8}"
+        )
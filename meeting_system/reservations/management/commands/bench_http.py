@@ -0,0 +1,136 @@
+import json
+import random
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from users.tokens import UserRefreshToken
+
+from reservations.benchmark import run_concurrent
+
+# 同步接口与对应的异步接口
+ENDPOINTS = {
+    "rooms_list": ("GET", "/api/rooms/list/", "/api/rooms/async/list/"),
+    "my": ("GET", "/api/reservations/my/", "/api/reservations/async/my/"),
+    "check": ("POST", "/api/reservations/check/", "/api/reservations/async/check/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "通过 HTTP 压测已启动的服务，对比同步视图与异步视图的吞吐量和延迟。"
+        "分别在 WSGI（runserver / gunicorn）与 ASGI（uvicorn / daphne）下运行后比较结果"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="服务地址")
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="用于签发 JWT 的用户名（服务需使用同一数据库与密钥）",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="每个接口的请求数"
+        )
+        parser.add_argument("--concurrency", type=int, default=64, help="并发线程数")
+        parser.add_argument(
+            "--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS)
+        )
+        parser.add_argument(
+            "--variants",
+            nargs="+",
+            choices=["sync", "async"],
+            default=["sync", "async"],
+            help="压测同步接口、异步接口或两者",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=30, help="单个请求超时（秒）"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="随机种子")
+        parser.add_argument("--output", help="结果 JSON 的保存路径")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"用户 {options['user']} 不存在")
+
+        token = str(UserRefreshToken.for_user(user).access_token)
+        base = options["url"].rstrip("/")
+        today = timezone.localdate()
+        rng = random.Random(options["seed"])
+
+        def send(method, path, body=None):
+            data = json.dumps(body).encode() if body is not None else None
+            request = urllib.request.Request(
+                base + path,
+                data=data,
+                method=method,
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "Content-Type": "application/json",
+                },
+            )
+            try:
+                with urllib.request.urlopen(
+                    request, timeout=options["timeout"]
+                ) as resp:
+                    return json.loads(resp.read())["code"] == 0
+            except (urllib.error.URLError, OSError, ValueError):
+                return False
+
+        def make_request(method, path):
+            def call(i):
+                if method == "GET":
+                    return send(method, path)
+                start = rng.randrange(8, 20)
+                body = {
+                    "date": (today + timedelta(days=rng.randrange(1, 15))).isoformat(),
+                    "start_hour": start,
+                    "end_hour": start + rng.randint(1, 3),
+                    "people": 4,
+                }
+                return send(method, path, body)
+
+            return call
+
+        results = {}
+        for name in options["endpoints"]:
+            method, sync_path, async_path = ENDPOINTS[name]
+            paths = {"sync": sync_path, "async": async_path}
+            results[name] = {
+                variant: run_concurrent(
+                    make_request(method, paths[variant]),
+                    options["requests"],
+                    options["concurrency"],
+                )
+                for variant in options["variants"]
+            }
+
+        self.stdout.write(
+            f"{'endpoint':<11} {'variant':<8} {'n':>6} {'err':>5} {'p50':>8} "
+            f"{'p99':>8} {'rps':>8}"
+        )
+        for name, variants in results.items():
+            for variant, r in variants.items():
+                self.stdout.write(
+                    f"{name:<11} {variant:<8} {r['count']:>6} {r['errors']:>5} "
+                    f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['throughput_rps']:>8}"
+                )
+
+        if options["output"]:
+            report = {
+                "meta": {
+                    "url": base,
+                    "timestamp": timezone.now().isoformat(),
+                    "requests": options["requests"],
+                    "concurrency": options["concurrency"],
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"结果已保存到 {options['output']}")
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reservations.benchmark import run_serial, seed_dataset
+from reservations.search import find_free_slots
+
+
+class Command(BaseCommand):
+    help = "测量最早空闲时段搜索在大窗口、多会议室下的耗时与查询次数（数据在事务中生成并回滚）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=300, help="会议室数量")
+        parser.add_argument("--reservations", type=int, default=30000, help="预约数量")
+        parser.add_argument("--days", type=int, default=30, help="搜索窗口天数")
+        parser.add_argument("--repeat", type=int, default=20, help="每组重复次数")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        date_from = today + timedelta(days=1)
+        date_to = date_from + timedelta(days=options["days"] - 1)
+
+        # 依次加大难度：最后一组几乎找不到空位，需要扫完整个窗口
+        cases = [
+            ("2h/4人/前5个", 2, 4, 0, 24, 5),
+            ("3h/12人/9-18点/前20个", 3, 12, 9, 18, 20),
+            ("8h/50人/9-17点/前50个", 8, 50, 9, 17, 50),
+        ]
+
+        with transaction.atomic():
+            seed_dataset(
+                rooms=options["rooms"],
+                users=50,
+                reservations=options["reservations"],
+                days=options["days"] + 1,
+            )
+
+            self.stdout.write(
+                f"rooms={options['rooms']} reservations={options['reservations']} "
+                f"window={options['days']}d"
+            )
+            self.stdout.write(
+                f"{'case':<24} {'found':>6} {'queries':>8} {'p50_ms':>8} {'p99_ms':>8}"
+            )
+            for name, duration, people, earliest, latest, limit in cases:
+                found = []
+
+                def search(i):
+                    found[:] = find_free_slots(
+                        duration,
+                        people,
+                        date_from,
+                        date_to,
+                        earliest=earliest,
+                        latest=latest,
+                        limit=limit,
+                    )
+                    return True
+
+                r = run_serial(search, options["repeat"])
+                self.stdout.write(
+                    f"{name:<24} {len(found):>6} {r['queries_per_request']:>8} "
+                    f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+                )
+
+            transaction.set_rollback(True)
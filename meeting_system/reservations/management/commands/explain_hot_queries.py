@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from reservations.models import Reservation, RoomOccupancy
+from reservations.occupancy import ACTIVE_STATUSES as ACTIVE, hours_mask
+from rooms.models import MeetingRoom
+
+
+class Command(BaseCommand):
+    help = "对预约相关的热点查询执行 EXPLAIN，用于升级后检查索引是否命中"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room", type=int, default=1, help="会议室 ID")
+        parser.add_argument("--user", type=int, default=1, help="用户 ID")
+        parser.add_argument("--date", help="预约日期 YYYY-MM-DD，默认今天")
+        parser.add_argument("--start", type=int, default=9, help="开始小时")
+        parser.add_argument("--end", type=int, default=11, help="结束小时")
+
+    def handle(self, *args, **options):
+        try:
+            date = (
+                datetime.strptime(options["date"], "%Y-%m-%d").date()
+                if options["date"]
+                else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError("日期格式错误，应为 YYYY-MM-DD")
+
+        room, user = options["room"], options["user"]
+        start, end = options["start"], options["end"]
+
+        overlap = {"start_hour__lt": end, "end_hour__gt": start}
+        queries = {
+            # reservations.views.check_room_conflict / create_reservation_view
+            "room_occupancy": RoomOccupancy.objects.filter(room_id=room, date=date),
+            # reservations.views.filter_available_rooms
+            "filter_available_rooms": MeetingRoom.objects.filter(
+                capacity__gte=1, is_available=True
+            ).filter(
+                ~Exists(
+                    RoomOccupancy.objects.filter(room_id=OuterRef("pk"), date=date)
+                    .annotate(clash=F("mask").bitand(hours_mask(start, end)))
+                    .exclude(clash=0)
+                )
+            ),
+            # ReservationAdminForm.clean
+            "admin_form_conflict": Reservation.objects.filter(
+                room_id=room, date=date, status__in=ACTIVE, **overlap
+            ).exclude(id=0),
+            # ReservationAdmin.approve_reservations
+            "approve_conflict": Reservation.objects.filter(
+                room_id=room, date=date, status__in=["APPROVED", "USED"], **overlap
+            ).exclude(id=0),
+            # reservations.views.my_reservations_view
+            "my_reservations": Reservation.objects.filter(user_id=user).order_by(
+                "-date", "-start_hour"
+            ),
+        }
+
+        self.stdout.write(f"数据库后端：{connection.vendor}")
+        for name, qs in queries.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name} =="))
+            self.stdout.write(str(qs.query))
+            self.stdout.write(qs.explain())
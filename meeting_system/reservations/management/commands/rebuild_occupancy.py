@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reservations import occupancy
+
+
+class Command(BaseCommand):
+    help = "对照预约表校验（--verify）或重建会议室占用位图与时段表"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="只检查不修改，存在不一致时以非零状态退出",
+        )
+        parser.add_argument(
+            "--from", dest="date_from", help="只处理该日期（YYYY-MM-DD）及之后"
+        )
+
+    def handle(self, *args, **options):
+        date_from = None
+        if options["date_from"]:
+            try:
+                date_from = datetime.strptime(options["date_from"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("日期格式错误，应为 YYYY-MM-DD")
+
+        with transaction.atomic():
+            mismatches = occupancy.diff(date_from)
+
+            for room_id, date, stored, slotted, expected in mismatches:
+                self.stdout.write(
+                    f"room={room_id} date={date} mask={stored:024b} "
+                    f"slots={slotted:024b} expected={expected:024b}"
+                )
+
+            if options["verify"]:
+                if mismatches:
+                    raise CommandError(f"{len(mismatches)} 处占用数据与预约表不一致")
+                self.stdout.write(self.style.SUCCESS("占用位图、时段表与预约表一致"))
+                return
+
+            occupancy.repair(mismatches)
+
+        self.stdout.write(self.style.SUCCESS(f"已修正 {len(mismatches)} 处占用数据"))
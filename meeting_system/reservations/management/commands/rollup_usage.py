@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "更新会议室使用统计日汇总：默认只重算上次以来有变化的日子，"
+        "--backfill 按日期范围全部重算。建议由 cron 每隔几分钟调用"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="全部重算（可用 --from / --to 限定范围）",
+        )
+        parser.add_argument("--from", dest="date_from", help="起始日期 YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="结束日期 YYYY-MM-DD（含）")
+
+    def handle(self, *args, **options):
+        try:
+            date_from, date_to = (
+                datetime.strptime(options[k], "%Y-%m-%d").date() if options[k] else None
+                for k in ("date_from", "date_to")
+            )
+        except ValueError:
+            raise CommandError("日期格式错误，应为 YYYY-MM-DD")
+
+        if options["backfill"]:
+            count = analytics.backfill(date_from, date_to)
+        else:
+            if date_from or date_to:
+                raise CommandError("--from / --to 只能与 --backfill 一起使用")
+            count = analytics.refresh()
+
+        self.stdout.write(self.style.SUCCESS(f"已重算 {count} 个会议室日汇总"))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reservations import lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        "按时间推进预约状态：过期未审批、超过宽限期未确认使用、已结束，"
+        "并释放占用。可由 cron 定时调用，或用 --loop 常驻运行"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="常驻运行，循环执行")
+        parser.add_argument(
+            "--interval", type=int, default=60, help="--loop 时两轮之间的间隔（秒）"
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help="每批处理条数")
+        parser.add_argument("--dry-run", action="store_true", help="只统计不修改")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = lifecycle.sweep(
+                batch_size=options["batch_size"], dry_run=options["dry_run"]
+            )
+            summary = " ".join(f"{name}={n}" for name, n in counts.items())
+            self.stdout.write(("[dry-run] " if options["dry_run"] else "") + summary)
+
+            if not options["loop"]:
+                return
+            # 长时间运行的进程需主动回收失效的数据库连接
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 07:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0001_initial'),
+        ('rooms', '0002_alter_meetingroom_options_meetingroom_area_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'date', 'status', 'start_hour', 'end_hour'], name='reservation_room_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'start_hour'], name='reservation_user_date_idx'),
+        ),
+    ]
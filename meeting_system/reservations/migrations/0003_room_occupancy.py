@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 07:48
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_occupancy(apps, schema_editor):
+    """根据已有的 PENDING/APPROVED/USED 预约生成占用位图"""
+    Reservation = apps.get_model('reservations', 'Reservation')
+    RoomOccupancy = apps.get_model('reservations', 'RoomOccupancy')
+
+    masks = defaultdict(int)
+    rows = Reservation.objects.filter(
+        status__in=['PENDING', 'APPROVED', 'USED']
+    ).values_list('room_id', 'date', 'start_hour', 'end_hour')
+    for room_id, date, start, end in rows.iterator(chunk_size=2000):
+        masks[(room_id, date)] |= ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    RoomOccupancy.objects.bulk_create(
+        [
+            RoomOccupancy(room_id=room_id, date=date, mask=mask)
+            for (room_id, date), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0002_reservation_indexes'),
+        ('rooms', '0002_alter_meetingroom_options_meetingroom_area_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('mask', models.IntegerField(default=0, verbose_name='占用位图')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.meetingroom', verbose_name='会议室')),
+            ],
+            options={
+                'verbose_name': '会议室占用位图',
+                'db_table': 'room_occupancy',
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='room_occupancy_room_date_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_slots(apps, schema_editor):
+    """
+    为今天及以后的 PENDING/APPROVED/USED 预约生成时段行
+    旧数据写入时没有冲突锁，可能存在互相重叠的预约：同一时段只生成一行，
+    并忽略唯一约束冲突，避免迁移中断；过去的日期不再参与冲突检查，无需回填
+    """
+    Reservation = apps.get_model('reservations', 'Reservation')
+    ReservationSlot = apps.get_model('reservations', 'ReservationSlot')
+
+    rows = Reservation.objects.filter(
+        status__in=['PENDING', 'APPROVED', 'USED'],
+        date__gte=timezone.localdate(),
+    ).values_list('room_id', 'date', 'start_hour', 'end_hour')
+    slots = set()
+    for room_id, date, start, end in rows.iterator(chunk_size=2000):
+        slots.update((room_id, date, hour) for hour in range(start, end))
+
+    ReservationSlot.objects.bulk_create(
+        [
+            ReservationSlot(room_id=room_id, date=date, hour=hour)
+            for room_id, date, hour in sorted(slots)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0004_reservation_updated_at'),
+        ('rooms', '0003_meetingroom_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('hour', models.SmallIntegerField(verbose_name='小时')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.meetingroom', verbose_name='会议室')),
+            ],
+            options={
+                'verbose_name': '预约时段',
+                'db_table': 'reservation_slot',
+                'constraints': [models.UniqueConstraint(fields=('room', 'date', 'hour'), name='reservation_slot_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0005_reservation_slot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservation',
+            name='status',
+            field=models.CharField(choices=[('PENDING', '审核中'), ('APPROVED', '已通过'), ('REJECTED', '已驳回'), ('CANCELED', '已取消'), ('USED', '已使用'), ('EXPIRED', '已过期'), ('NO_SHOW', '未使用'), ('COMPLETED', '已结束')], default='PENDING', max_length=20, verbose_name='状态'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['status', 'date', 'start_hour'], name='reservation_status_date_idx'),
+        ),
+    ]
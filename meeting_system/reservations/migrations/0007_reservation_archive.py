@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 08:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_reservation_lifecycle'),
+        ('rooms', '0003_meetingroom_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedReservation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='预约日期')),
+                ('start_hour', models.IntegerField(verbose_name='开始时间(小时)')),
+                ('end_hour', models.IntegerField(verbose_name='结束时间(小时)')),
+                ('topic', models.CharField(blank=True, max_length=255, null=True, verbose_name='会议主题')),
+                ('status', models.CharField(choices=[('PENDING', '审核中'), ('APPROVED', '已通过'), ('REJECTED', '已驳回'), ('CANCELED', '已取消'), ('USED', '已使用'), ('EXPIRED', '已过期'), ('NO_SHOW', '未使用'), ('COMPLETED', '已结束')], max_length=20, verbose_name='状态')),
+                ('reject_reason', models.CharField(blank=True, max_length=255, null=True, verbose_name='驳回原因')),
+                ('approve_time', models.DateTimeField(blank=True, null=True, verbose_name='审批时间')),
+                ('updated_at', models.DateTimeField(verbose_name='更新时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.meetingroom', verbose_name='会议室')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='预约人')),
+            ],
+            options={
+                'verbose_name': '历史预约',
+                'verbose_name_plural': '历史预约',
+                'db_table': 'reservation_archive',
+                'indexes': [models.Index(fields=['user', 'date', 'start_hour'], name='reservation_arch_user_idx'), models.Index(fields=['user', 'updated_at'], name='reservation_arch_updated_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 08:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_reservation_archive'),
+        ('rooms', '0003_meetingroom_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('booked_hours', models.IntegerField(default=0, verbose_name='预约小时数')),
+                ('used_hours', models.IntegerField(default=0, verbose_name='使用小时数')),
+                ('canceled_hours', models.IntegerField(default=0, verbose_name='取消小时数')),
+                ('no_show_hours', models.IntegerField(default=0, verbose_name='未使用小时数')),
+                ('booked_mask', models.IntegerField(default=0, verbose_name='预约时段位图')),
+                ('source_updated_at', models.DateTimeField(null=True, verbose_name='数据更新时间')),
+                ('dirty', models.BooleanField(default=False, verbose_name='待重算')),
+            ],
+            options={
+                'verbose_name': '会议室使用日汇总',
+                'verbose_name_plural': '会议室使用日汇总',
+                'db_table': 'room_daily_usage',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['updated_at'], name='reservation_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='roomdailyusage',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='rooms.meetingroom', verbose_name='会议室'),
+        ),
+        migrations.AddIndex(
+            model_name='roomdailyusage',
+            index=models.Index(fields=['date'], name='room_daily_usage_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomdailyusage',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='room_daily_usage_uniq'),
+        ),
+    ]
@@ -10,6 +10,10 @@ class Reservation(models.Model):
         ('REJECTED', '已驳回'),
         ('CANCELED', '已取消'),
         ('USED', '已使用'),
+        # 以下由定时任务（run_lifecycle）流转，均为终态
+        ('EXPIRED', '已过期'),
+        ('NO_SHOW', '未使用'),
+        ('COMPLETED', '已结束'),
     )
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="预约人")
@@ -24,7 +28,139 @@ class Reservation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', verbose_name="状态")
     reject_reason = models.CharField(max_length=255, null=True, blank=True, verbose_name="驳回原因")
     approve_time = models.DateTimeField(null=True, blank=True, verbose_name="审批时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
 
     class Meta:
         db_table = 'reservation'
         verbose_name = '预约记录'
+        indexes = [
+            # 冲突检查：room/date/status 等值 + start_hour 范围，end_hour 也在索引内，无需回表
+            models.Index(
+                fields=['room', 'date', 'status', 'start_hour', 'end_hour'],
+                name='reservation_room_slot_idx',
+            ),
+            # 我的预约：按用户过滤并按日期、开始时间倒序
+            models.Index(
+                fields=['user', 'date', 'start_hour'],
+                name='reservation_user_date_idx',
+            ),
+            # 我的预约的版本戳（ETag）：按用户取 MAX(updated_at) 与 COUNT(*)
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='reservation_user_updated_idx',
+            ),
+            # 生命周期扫描：按状态取开始时间已过的预约
+            models.Index(
+                fields=['status', 'date', 'start_hour'],
+                name='reservation_status_date_idx',
+            ),
+            # 使用统计增量重算：取水位线之后变化过的预约
+            models.Index(
+                fields=['updated_at'],
+                name='reservation_updated_idx',
+            ),
+        ]
+
+
+class RoomOccupancy(models.Model):
+    """
+    会议室按天的占用位图（冗余表）
+    第 h 位为 1 表示 h:00-(h+1):00 已被 PENDING/APPROVED/USED 的预约占用
+    """
+
+    room = models.ForeignKey('rooms.MeetingRoom', on_delete=models.CASCADE, verbose_name="会议室")
+    date = models.DateField(verbose_name="日期")
+    mask = models.IntegerField(default=0, verbose_name="占用位图")
+
+    class Meta:
+        db_table = 'room_occupancy'
+        verbose_name = '会议室占用位图'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='room_occupancy_room_date_uniq'),
+        ]
+
+
+class ReservationSlot(models.Model):
+    """
+    预约占用的整点时段，每小时一行
+    (room, date, hour) 唯一约束由数据库保证同一时段不会被重复占用
+    """
+
+    room = models.ForeignKey('rooms.MeetingRoom', on_delete=models.CASCADE, verbose_name="会议室")
+    date = models.DateField(verbose_name="日期")
+    hour = models.SmallIntegerField(verbose_name="小时")
+
+    class Meta:
+        db_table = 'reservation_slot'
+        verbose_name = '预约时段'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date', 'hour'], name='reservation_slot_uniq'),
+        ]
+
+
+class ArchivedReservation(models.Model):
+    """
+    归档的历史预约（冷数据），由 archive_reservations 从 reservation 表迁入
+    字段与 Reservation 相同，保留原 id；只读，只在明确查询历史时访问
+    """
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="预约人")
+    room = models.ForeignKey('rooms.MeetingRoom', on_delete=models.CASCADE, verbose_name="会议室")
+    date = models.DateField(verbose_name="预约日期")
+    start_hour = models.IntegerField(verbose_name="开始时间(小时)")
+    end_hour = models.IntegerField(verbose_name="结束时间(小时)")
+    topic = models.CharField(max_length=255, null=True, blank=True, verbose_name="会议主题")
+    status = models.CharField(max_length=20, choices=Reservation.STATUS_CHOICES, verbose_name="状态")
+    reject_reason = models.CharField(max_length=255, null=True, blank=True, verbose_name="驳回原因")
+    approve_time = models.DateTimeField(null=True, blank=True, verbose_name="审批时间")
+    updated_at = models.DateTimeField(verbose_name="更新时间")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="归档时间")
+
+    class Meta:
+        db_table = 'reservation_archive'
+        verbose_name = '历史预约'
+        verbose_name_plural = '历史预约'
+        indexes = [
+            # 历史记录分页：与 reservation_user_date_idx 相同
+            models.Index(
+                fields=['user', 'date', 'start_hour'],
+                name='reservation_arch_user_idx',
+            ),
+            # 历史记录的版本戳（ETag）
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='reservation_arch_updated_idx',
+            ),
+        ]
+
+
+class RoomDailyUsage(models.Model):
+    """
+    会议室按天的使用汇总（统计用，由 rollup_usage 根据预约表与归档表增量重算）
+    报表只读本表：一年、全部会议室也只有 会议室数 × 天数 行，且按会议室 / 星期 / 小时聚合后很小
+    """
+
+    room = models.ForeignKey('rooms.MeetingRoom', on_delete=models.CASCADE, verbose_name="会议室")
+    date = models.DateField(verbose_name="日期")
+    booked_hours = models.IntegerField(default=0, verbose_name="预约小时数")
+    used_hours = models.IntegerField(default=0, verbose_name="使用小时数")
+    canceled_hours = models.IntegerField(default=0, verbose_name="取消小时数")
+    no_show_hours = models.IntegerField(default=0, verbose_name="未使用小时数")
+    # 被预约的整点小时，第 h 位表示 h:00-(h+1):00，按小时统计时逐位求和
+    booked_mask = models.IntegerField(default=0, verbose_name="预约时段位图")
+    # 参与计算的预约中最大的 updated_at，用作增量重算的水位线
+    source_updated_at = models.DateTimeField(null=True, verbose_name="数据更新时间")
+    # 当天有预约被删除时置位，下次重算
+    dirty = models.BooleanField(default=False, verbose_name="待重算")
+
+    class Meta:
+        db_table = 'room_daily_usage'
+        verbose_name = '会议室使用日汇总'
+        verbose_name_plural = '会议室使用日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='room_daily_usage_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='room_daily_usage_date_idx'),
+        ]
@@ -0,0 +1,252 @@
+"""
+会议室占用位图与时段表的读写
+
+一天 24 个整点小时正好放进一个整数：第 h 位表示 h:00-(h+1):00。
+时段表（ReservationSlot）每个被占用的小时一行，由唯一约束兜底防止重复占用。
+所有修改都在调用方的事务中执行，与预约表的写入同时提交或回滚。
+每个日期在共享缓存中有一个版本号，位图变动的事务提交后递增，供进程内索引判断是否过期。
+"""
+
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from .models import Reservation, ReservationSlot, RoomOccupancy
+
+# 占用时间段的预约状态
+ACTIVE_STATUSES = ["PENDING", "APPROVED", "USED"]
+
+FULL_DAY = (1 << 24) - 1
+
+
+def hours_mask(start: int, end: int) -> int:
+    """[start, end) 对应的位图"""
+    return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+
+def _cache():
+    return caches[getattr(settings, "RESERVATION_OCCUPANCY_CACHE", "default")]
+
+
+def _version_key(date) -> str:
+    return f"reservations:occupancy:{date}:version"
+
+
+def day_versions(dates) -> dict:
+    """
+    各日期位图的版本号：{date: version}
+    版本号不存在（从未写过或已被缓存淘汰）时以当前时间初始化，
+    保证与之前读到的任何值都不同
+    """
+    cache = _cache()
+    keys = {_version_key(date): date for date in dates}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        found[key] = cache.get(key)
+    return {date: found[key] for key, date in keys.items()}
+
+
+def _bump_versions(dates):
+    cache = _cache()
+    for date in dates:
+        key = _version_key(date)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def mark_changed(dates):
+    """位图有变动的日期：事务提交后递增版本号"""
+    dates = set(dates)
+    transaction.on_commit(lambda: _bump_versions(dates))
+
+
+def ensure_day(room_id: int, date):
+    """幂等插入 (会议室, 日期) 的位图行，已存在时什么也不做"""
+    RoomOccupancy.objects.bulk_create(
+        [RoomOccupancy(room_id=room_id, date=date)], ignore_conflicts=True
+    )
+
+
+def lock_day(room_id: int, date) -> RoomOccupancy:
+    """
+    取出并锁定 (会议室, 日期) 的位图行，不存在则创建；必须在事务中调用
+    先幂等插入再按唯一键加锁：对不存在的行 SELECT ... FOR UPDATE 会加间隙锁，
+    两个并发的首次预约都拿到间隙锁后再插入会互相死锁
+    """
+    ensure_day(room_id, date)
+    return RoomOccupancy.objects.select_for_update().get(room_id=room_id, date=date)
+
+
+def is_free(room_id: int, date, start: int, end: int) -> bool:
+    """一次主键级查找 + 位与判断时间段是否空闲"""
+    mask = (
+        RoomOccupancy.objects.filter(room_id=room_id, date=date)
+        .values_list("mask", flat=True)
+        .first()
+    )
+    return not (mask or 0) & hours_mask(start, end)
+
+
+def day_masks(date, room_ids=None) -> dict:
+    """一次查询取出某天所有（或指定）会议室的位图：{room_id: mask}"""
+    qs = RoomOccupancy.objects.filter(date=date)
+    if room_ids is not None:
+        qs = qs.filter(room_id__in=room_ids)
+    return dict(qs.values_list("room_id", "mask"))
+
+
+def claim_slots(room_id: int, date, start: int, end: int):
+    """
+    插入时段行，时段已被占用时抛出 IntegrityError
+    按小时升序插入，并发事务加锁顺序一致，不会互相死锁
+    """
+    ReservationSlot.objects.bulk_create(
+        ReservationSlot(room_id=room_id, date=date, hour=hour)
+        for hour in range(start, end)
+    )
+
+
+def add_bits(room_id: int, date, bits: int):
+    """位图按位或，不做加锁读；按位或可交换，并发写入无需先读后写"""
+    day = RoomOccupancy.objects.filter(room_id=room_id, date=date)
+    if not day.update(mask=F("mask").bitor(bits)):
+        ensure_day(room_id, date)
+        day.update(mask=F("mask").bitor(bits))
+    mark_changed([date])
+
+
+def occupy(room_id: int, date, start: int, end: int):
+    """占用时间段（调用方需已通过冲突检查）"""
+    claim_slots(room_id, date, start, end)
+    add_bits(room_id, date, hours_mask(start, end))
+
+
+def release(room_id: int, date, start: int, end: int):
+    """释放时间段"""
+    release_many([(room_id, date, start, end)])
+
+
+def release_many(slots):
+    """
+    批量释放 [(room_id, date, start, end), ...]
+    同一会议室同一天的时间段合并后只执行一次 UPDATE 和一次 DELETE
+    """
+    merged = defaultdict(int)
+    for room_id, date, start, end in slots:
+        merged[(room_id, date)] |= hours_mask(start, end)
+
+    for (room_id, date), bits in merged.items():
+        RoomOccupancy.objects.filter(room_id=room_id, date=date).update(
+            mask=F("mask").bitand(FULL_DAY ^ bits)
+        )
+        ReservationSlot.objects.filter(
+            room_id=room_id, date=date, hour__in=mask_hours(bits)
+        ).delete()
+    mark_changed(date for _, date in merged)
+
+
+def mask_hours(mask: int) -> list:
+    """位图中为 1 的小时"""
+    return [hour for hour in range(24) if mask >> hour & 1]
+
+
+def apply_change(old, new):
+    """
+    预约时间段或状态变化后同步位图
+    old / new 为 (room_id, date, start, end, status)，新建时 old 为 None
+    """
+    if old and old[4] in ACTIVE_STATUSES:
+        release(*old[:4])
+    if new and new[4] in ACTIVE_STATUSES:
+        occupy(*new[:4])
+
+
+def mask_runs(mask: int) -> list:
+    """位图转为连续占用区间 [[start, end], ...]"""
+    runs, hour = [], 0
+    while hour < 24:
+        if mask >> hour & 1:
+            start = hour
+            while hour < 24 and mask >> hour & 1:
+                hour += 1
+            runs.append([start, hour])
+        else:
+            hour += 1
+    return runs
+
+
+def range_masks(date_from, date_to, room_ids=None) -> dict:
+    """一次查询取出日期范围内的位图：{(room_id, date): mask}"""
+    qs = RoomOccupancy.objects.filter(date__gte=date_from, date__lte=date_to)
+    if room_ids is not None:
+        qs = qs.filter(room_id__in=room_ids)
+    return {
+        (room_id, date): mask
+        for room_id, date, mask in qs.values_list("room_id", "date", "mask")
+    }
+
+
+def expected_masks(date_from=None) -> dict:
+    """根据预约表重新计算位图：{(room_id, date): mask}"""
+    qs = Reservation.objects.filter(status__in=ACTIVE_STATUSES)
+    if date_from is not None:
+        qs = qs.filter(date__gte=date_from)
+
+    masks = defaultdict(int)
+    for room_id, date, start, end in qs.values_list(
+        "room_id", "date", "start_hour", "end_hour"
+    ).iterator(chunk_size=2000):
+        masks[(room_id, date)] |= hours_mask(start, end)
+    return masks
+
+
+def diff(date_from=None) -> list:
+    """
+    对比位图表、时段表与预约表
+    返回不一致项 [(room_id, date, 位图表中的值, 时段表折算的值, 期望值), ...]
+    """
+    expected = expected_masks(date_from)
+
+    stored_qs = RoomOccupancy.objects.all()
+    slot_qs = ReservationSlot.objects.all()
+    if date_from is not None:
+        stored_qs = stored_qs.filter(date__gte=date_from)
+        slot_qs = slot_qs.filter(date__gte=date_from)
+
+    stored = {
+        (room_id, date): mask
+        for room_id, date, mask in stored_qs.values_list("room_id", "date", "mask")
+    }
+    slotted = defaultdict(int)
+    for room_id, date, hour in slot_qs.values_list("room_id", "date", "hour").iterator(
+        chunk_size=2000
+    ):
+        slotted[(room_id, date)] |= 1 << hour
+
+    mismatches = []
+    for key in expected.keys() | stored.keys() | slotted.keys():
+        want = expected.get(key, 0)
+        if stored.get(key, 0) != want or slotted.get(key, 0) != want:
+            mismatches.append((*key, stored.get(key, 0), slotted.get(key, 0), want))
+    return sorted(mismatches, key=lambda m: (m[1], m[0]))
+
+
+def repair(mismatches):
+    """按 diff() 的结果修正位图表与时段表"""
+    for room_id, date, _, _, expected in mismatches:
+        RoomOccupancy.objects.update_or_create(
+            room_id=room_id, date=date, defaults={"mask": expected}
+        )
+        ReservationSlot.objects.filter(room_id=room_id, date=date).delete()
+        ReservationSlot.objects.bulk_create(
+            ReservationSlot(room_id=room_id, date=date, hour=hour)
+            for hour in mask_hours(expected)
+        )
+    mark_changed(date for _, date, _, _, _ in mismatches)
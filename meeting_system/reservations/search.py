@@ -0,0 +1,81 @@
+"""
+最早空闲时段搜索
+
+一次取出窗口内所有会议室的占用位图，对每个会议室每天算出“可作为开始时间的小时”位图：
+把空闲位图与自身右移 1..duration-1 位逐次按位与，剩下的 1 即可连续空闲 duration 小时的起点。
+之后按 (日期, 开始时间, 容量, 会议室) 顺序取前 N 个，全程不再查库。
+"""
+
+from datetime import timedelta
+
+from . import occupancy
+
+from rooms.models import MeetingRoom
+
+# 单次搜索的最大天数与返回条数
+MAX_SEARCH_DAYS = 31
+MAX_SEARCH_RESULTS = 50
+
+
+def start_mask(busy: int, duration: int, earliest: int = 0, latest: int = 24) -> int:
+    """
+    可作为开始时间的小时位图
+    要求 [start, start + duration) 全部空闲，且 earliest <= start、start + duration <= latest
+    """
+    free = occupancy.FULL_DAY ^ busy
+    starts = free
+    for k in range(1, duration):
+        starts &= free >> k
+    if latest - duration < earliest:
+        return 0
+    return starts & occupancy.hours_mask(earliest, latest - duration + 1)
+
+
+def find_free_slots(
+    duration,
+    people,
+    date_from,
+    date_to,
+    earliest=0,
+    latest=24,
+    limit=5,
+    not_before=None,
+):
+    """
+    返回最早的 limit 个候选 [(room, date, start_hour), ...]
+    not_before=(date, hour)：该日期早于 hour 的开始时间不可用（当天已过去的时间）
+    """
+    rooms = list(
+        MeetingRoom.objects.filter(capacity__gte=people, is_available=True).order_by(
+            "capacity", "id"
+        )
+    )
+    if not rooms:
+        return []
+    masks = occupancy.range_masks(date_from, date_to)
+
+    results = []
+    date = date_from
+    while date <= date_to and len(results) < limit:
+        day_earliest = earliest
+        if not_before and date == not_before[0]:
+            day_earliest = max(earliest, not_before[1])
+
+        starts = [
+            (
+                room,
+                start_mask(
+                    masks.get((room.id, date), 0), duration, day_earliest, latest
+                ),
+            )
+            for room in rooms
+        ]
+        for hour in range(day_earliest, latest - duration + 1):
+            for room, mask in starts:
+                if mask >> hour & 1:
+                    results.append((room, date, hour))
+                    if len(results) >= limit:
+                        return results
+        date += timedelta(days=1)
+
+    return results
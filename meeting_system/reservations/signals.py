@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from . import analytics, events, occupancy
+from .models import Reservation
+
+
+@receiver(post_delete, sender=Reservation)
+def release_deleted_reservation(sender, instance, **kwargs):
+    """删除预约（含后台批量删除、删除用户级联）时释放占用位图、推送事件，并标记使用统计待重算"""
+    if instance.status in occupancy.ACTIVE_STATUSES:
+        occupancy.release(
+            instance.room_id, instance.date, instance.start_hour, instance.end_hour
+        )
+    events.publish(events.DELETED, [instance])
+    # 归档（events.suppressed() 块内）只是换表存放，使用统计同样读取归档表，无需重算
+    if not events.is_suppressed():
+        analytics.mark_dirty(instance.room_id, instance.date)
@@ -1,3 +1,1317 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import (
+    AsyncRequestFactory,
+    Client,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from meeting_system import profiling
+from meeting_system.pubsub import get_broker
+from reservations import (
+    analytics,
+    archive,
+    async_views,
+    availability,
+    batch,
+    conflicts,
+    events,
+    export,
+    lifecycle,
+    occupancy,
+    search,
+)
+from reservations.admin import EstimatedCountPaginator, ReservationAdminForm
+from reservations.approval import approve_batch
+from reservations.models import (
+    ArchivedReservation,
+    Reservation,
+    ReservationSlot,
+    RoomDailyUsage,
+    RoomOccupancy,
+)
+from reservations.views import book_room, filter_available_rooms
+from rooms.models import MeetingRoom
+from users.tokens import UserRefreshToken
+
+
+class ReservationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+        self.room = MeetingRoom.objects.create(name="A", capacity=10)
+        self.other_room = MeetingRoom.objects.create(name="B", capacity=10)
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def reserve(self, start, end, status="PENDING", room=None, date=None, sync=True):
+        """直接写入一条预约；sync 为 False 时不同步占用，模拟迁移前的历史数据"""
+        room = room or self.room
+        date = date or self.date
+        r = Reservation.objects.create(
+            user=self.user,
+            room=room,
+            date=date,
+            start_hour=start,
+            end_hour=end,
+            status=status,
+        )
+        if sync:
+            occupancy.apply_change(None, (room.id, date, start, end, status))
+        return r
+
+    def create(self, start, end, room=None):
+        """通过接口预约，返回 code"""
+        return self.client.post(
+            "/api/reservations/create/",
+            {
+                "room_id": (room or self.room).id,
+                "date": self.date.isoformat(),
+                "start_hour": start,
+                "end_hour": end,
+                "people": 3,
+                "topic": "t",
+            },
+            format="json",
+        ).json()["code"]
+
+
+class OccupancyTests(ReservationTestCase):
+    def test_hours_mask_and_runs(self):
+        self.assertEqual(occupancy.hours_mask(9, 11), 0b11 << 9)
+        self.assertEqual(occupancy.hours_mask(0, 24), occupancy.FULL_DAY)
+        mask = occupancy.hours_mask(9, 11) | occupancy.hours_mask(14, 15)
+        self.assertEqual(occupancy.mask_runs(mask), [[9, 11], [14, 15]])
+        self.assertEqual(occupancy.mask_hours(mask), [9, 10, 14])
+
+    def test_create_cancel_and_delete_keep_occupancy_in_sync(self):
+        self.assertEqual(self.create(9, 11), 0)
+        self.assertEqual(self.create(10, 12), 409)
+        self.assertEqual(self.create(11, 12), 0)
+        self.assertFalse(occupancy.is_free(self.room.id, self.date, 10, 11))
+
+        first = Reservation.objects.get(start_hour=9)
+        response = self.client.post(f"/api/reservations/{first.id}/cancel")
+        self.assertEqual(response.json()["code"], 0)
+        self.assertTrue(occupancy.is_free(self.room.id, self.date, 9, 11))
+
+        Reservation.objects.get(start_hour=11).delete()
+        self.assertEqual(RoomOccupancy.objects.get().mask, 0)
+        self.assertEqual(ReservationSlot.objects.count(), 0)
+        self.assertEqual(occupancy.diff(), [])
+
+    def test_has_conflict_uses_occupancy(self):
+        self.reserve(9, 11)
+        self.assertTrue(conflicts.has_conflict(self.room.id, self.date, 10, 11))
+        self.assertFalse(conflicts.has_conflict(self.room.id, self.date, 11, 12))
+        self.assertFalse(conflicts.has_conflict(self.other_room.id, self.date, 9, 11))
+
+    def test_lock_day_creates_missing_row(self):
+        day = occupancy.lock_day(self.room.id, self.date)
+        self.assertEqual(day.mask, 0)
+        self.assertEqual(occupancy.lock_day(self.room.id, self.date).pk, day.pk)
+
+    def test_diff_and_repair(self):
+        self.reserve(9, 11)
+        RoomOccupancy.objects.update(mask=0)
+        mismatches = occupancy.diff()
+        self.assertEqual(len(mismatches), 1)
+        occupancy.repair(mismatches)
+        self.assertEqual(occupancy.diff(), [])
+
+
+class MyReservationsTests(ReservationTestCase):
+    def fetch(self, **params):
+        return self.client.get("/api/reservations/my/", params).json()
+
+    def test_cursor_pagination_walks_all_rows(self):
+        expected = []
+        for day in range(3):
+            for start in (9, 14):
+                r = self.reserve(start, start + 1, date=self.date + timedelta(days=day))
+                expected.append(r.id)
+        expected.reverse()
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.fetch(**params)["data"]
+            seen += [row["id"] for row in data["results"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+    def test_query_count_independent_of_page_size(self):
+        self.reserve(9, 10)
+        with CaptureQueriesContext(connection) as one:
+            self.fetch()
+
+        for day in range(1, 20):
+            self.reserve(9, 10, date=self.date + timedelta(days=day))
+        with CaptureQueriesContext(connection) as many:
+            rows = self.fetch()["data"]["results"]
+
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows[0]["room"], str(self.room))
+        self.assertEqual(len(many), len(one))
+
+    def test_filters_and_bad_params(self):
+        self.reserve(9, 10)
+        self.reserve(10, 11, "APPROVED")
+        rows = self.fetch(status="APPROVED")["data"]["results"]
+        self.assertEqual([row["status"] for row in rows], ["APPROVED"])
+        self.assertEqual(self.fetch(cursor="not-a-cursor")["code"], 400)
+        self.assertEqual(self.fetch(date_from="2030/01/01")["code"], 400)
+
+
+class MyReservationsConditionalTests(ReservationTestCase):
+    def test_etag_follows_changes(self):
+        r = self.reserve(9, 10)
+        response = self.client.get("/api/reservations/my/")
+        etag = response["ETag"]
+
+        response = self.client.get("/api/reservations/my/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # 查询参数不同视为不同的表示
+        response = self.client.get(
+            "/api/reservations/my/", {"limit": 5}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.client.post(f"/api/reservations/{r.id}/cancel")
+        response = self.client.get("/api/reservations/my/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["results"][0]["status"], "CANCELED")
+
+
+class ApprovalTests(ReservationTestCase):
+    def test_approve_batch(self):
+        # 互相重叠的待审批预约只会出现在历史数据里，这里不同步占用
+        approved = self.reserve(9, 10, "APPROVED", sync=False)
+        clash_existing = self.reserve(9, 11, sync=False)
+        ok = self.reserve(11, 12, sync=False)
+        first = self.reserve(9, 12, room=self.other_room, sync=False)
+        clash_batch = self.reserve(10, 11, room=self.other_room, sync=False)
+        expired = self.reserve(
+            9, 10, date=timezone.localdate() - timedelta(days=5), sync=False
+        )
+
+        approved_ids, skipped = approve_batch(Reservation.objects.all())
+
+        self.assertEqual(sorted(approved_ids), sorted([ok.id, first.id]))
+        self.assertEqual(
+            [pk for pk, _ in skipped],
+            sorted([approved.id, clash_existing.id, clash_batch.id, expired.id]),
+        )
+        statuses = dict(Reservation.objects.values_list("id", "status"))
+        self.assertEqual(statuses[ok.id], "APPROVED")
+        self.assertEqual(statuses[clash_batch.id], "PENDING")
+
+    def test_query_count_independent_of_batch_size(self):
+        for day in range(30):
+            self.reserve(9, 10, date=self.date + timedelta(days=day))
+        # 选取、查已通过的预约、UPDATE 各一次，外加事务保存点
+        with self.assertNumQueries(5):
+            approved_ids, skipped = approve_batch(Reservation.objects.all())
+        self.assertEqual((len(approved_ids), skipped), (30, []))
+
+
+class BatchTests(ReservationTestCase):
+    def post(self, **data):
+        body = {
+            "room_id": self.room.id,
+            "people": 3,
+            "topic": "weekly",
+            "start_hour": 9,
+            "end_hour": 10,
+        }
+        body.update(data)
+        return self.client.post(
+            "/api/reservations/create/batch/", body, format="json"
+        ).json()
+
+    def test_weekly_repeat(self):
+        result = self.post(
+            repeat={"freq": "weekly", "date": self.date.isoformat(), "count": 10}
+        )
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(result["data"]["created"], 10)
+        self.assertEqual(occupancy.diff(), [])
+
+    def test_results_and_events_carry_ids(self):
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = self.post(
+                    repeat={"freq": "daily", "date": self.date.isoformat(), "count": 3}
+                )
+
+        ids = sorted(Reservation.objects.values_list("id", flat=True))
+        self.assertEqual(sorted(r["id"] for r in result["data"]["results"]), ids)
+        published = {
+            message["id"]
+            for channel, message in (c.args for c in publish.call_args_list)
+            if channel.startswith("date:")
+        }
+        self.assertEqual(sorted(published), ids)
+
+    def test_all_or_nothing_and_best_effort(self):
+        self.reserve(9, 10)
+        daily = {"freq": "daily", "date": self.date.isoformat(), "count": 3}
+
+        result = self.post(repeat=daily)
+        self.assertEqual(result["code"], 409)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+        result = self.post(repeat=daily, mode="best_effort")
+        self.assertEqual(result["data"]["created"], 2)
+        self.assertEqual(
+            [r["ok"] for r in result["data"]["results"]], [False, True, True]
+        )
+        self.assertIsNone(result["data"]["results"][0]["id"])
+        self.assertEqual(occupancy.diff(), [])
+
+    def test_overlap_within_batch(self):
+        day = self.date.isoformat()
+        result = self.post(
+            slots=[
+                {"date": day, "start_hour": 12, "end_hour": 14},
+                {"date": day, "start_hour": 13, "end_hour": 15},
+            ],
+            mode="best_effort",
+        )
+        self.assertEqual([r["ok"] for r in result["data"]["results"]], [True, False])
+
+    def test_invalid_rules(self):
+        too_many = {"freq": "daily", "date": self.date.isoformat(), "count": 1000}
+        self.assertEqual(self.post(repeat=too_many)["code"], 400)
+        bad_freq = {"freq": "monthly", "date": self.date.isoformat(), "count": 1}
+        self.assertEqual(self.post(repeat=bad_freq)["code"], 400)
+
+
+@override_settings(RESERVATION_BOOKING_MODE="slot")
+class SlotModeTests(ReservationTestCase):
+    def test_rejects_overlap(self):
+        self.assertEqual(self.create(9, 11), 0)
+        self.assertEqual(self.create(10, 12), 409)
+        self.assertEqual(self.create(11, 12), 0)
+        self.assertEqual(ReservationSlot.objects.count(), 3)
+        self.assertEqual(occupancy.diff(), [])
+
+    def test_batch_rejects_slots_claimed_by_open_transactions(self):
+        # 另一个事务已插入时段行但尚未更新位图：位图看不到占用，只能由唯一约束拒绝
+        ReservationSlot.objects.create(room=self.room, date=self.date, hour=10)
+        day = self.date.isoformat()
+        body = {
+            "room_id": self.room.id,
+            "people": 3,
+            "slots": [
+                {"date": day, "start_hour": 9, "end_hour": 10},
+                {"date": day, "start_hour": 10, "end_hour": 11},
+            ],
+        }
+
+        result = self.client.post(
+            "/api/reservations/create/batch/", body, format="json"
+        ).json()
+        self.assertEqual(result["code"], 409)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+        body["mode"] = "best_effort"
+        result = self.client.post(
+            "/api/reservations/create/batch/", body, format="json"
+        ).json()
+        self.assertEqual(result["code"], 0)
+        self.assertEqual([r["ok"] for r in result["data"]["results"]], [True, False])
+        self.assertEqual(
+            occupancy.mask_hours(occupancy.day_masks(self.date)[self.room.id]), [9]
+        )
+
+    def test_cancel_frees_slots(self):
+        self.assertEqual(self.create(9, 11), 0)
+        r = Reservation.objects.get()
+        self.client.post(f"/api/reservations/{r.id}/cancel")
+        self.assertEqual(ReservationSlot.objects.count(), 0)
+        self.assertEqual(self.create(9, 11), 0)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBookingTests(TransactionTestCase):
+    """
+    多线程同时预约：每个时间段只能有一个赢家
+    需要支持行锁的数据库（MySQL / PostgreSQL），SQLite 下跳过
+    """
+
+    THREADS_PER_SLOT = 6
+    SLOTS = [(9, 11), (14, 15)]
+
+    def setUp(self):
+        self.user = User.objects.create_user("racer")
+        self.room = MeetingRoom.objects.create(name="Race", capacity=10)
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def race(self, jobs):
+        """同时执行 jobs（无参函数），返回 (各自的返回值, 抛出的异常)"""
+        barrier = threading.Barrier(len(jobs))
+        outcomes, errors = [None] * len(jobs), []
+
+        def worker(i, job):
+            try:
+                barrier.wait()
+                outcomes[i] = job()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(i, job)) for i, job in enumerate(jobs)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return outcomes, errors
+
+    def book(self, start, end):
+        return lambda: book_room(self.user, self.room, self.date, start, end, "race")
+
+    def assert_consistent(self):
+        """占用中的预约互不重叠，位图、时段表与预约表一致"""
+        hours = [
+            hour
+            for start, end in Reservation.objects.filter(
+                room=self.room, status__in=occupancy.ACTIVE_STATUSES
+            ).values_list("start_hour", "end_hour")
+            for hour in range(start, end)
+        ]
+        self.assertEqual(len(hours), len(set(hours)))
+        self.assertEqual(ReservationSlot.objects.count(), len(hours))
+        self.assertEqual(occupancy.diff(), [])
+
+    def assert_one_winner_per_slot(self):
+        slots = [slot for slot in self.SLOTS for _ in range(self.THREADS_PER_SLOT)]
+        outcomes, errors = self.race([self.book(*slot) for slot in slots])
+
+        self.assertEqual(errors, [])
+        for slot in self.SLOTS:
+            winners = [ok for s, ok in zip(slots, outcomes) if s == slot and ok]
+            self.assertEqual(len(winners), 1, slot)
+        self.assert_consistent()
+
+    def assert_batch_and_single_bookings_agree(self):
+        def book_batch():
+            created, _ = batch.create_batch(
+                self.user,
+                self.room,
+                [(self.date, 10, 11), (self.date, 14, 15)],
+                "race",
+                validate=lambda *args: None,
+            )
+            return created
+
+        jobs = [book_batch] * 3 + [self.book(*slot) for slot in self.SLOTS] * 3
+        outcomes, errors = self.race(jobs)
+
+        self.assertEqual(errors, [])
+        # 整批要么两段都创建，要么都不创建
+        self.assertTrue(all(created in (0, 2) for created in outcomes[:3]))
+        self.assert_consistent()
+
+    @override_settings(RESERVATION_BOOKING_MODE="lock")
+    def test_lock_mode(self):
+        self.assert_one_winner_per_slot()
+
+    @override_settings(RESERVATION_BOOKING_MODE="slot")
+    def test_slot_mode(self):
+        self.assert_one_winner_per_slot()
+
+    @override_settings(RESERVATION_BOOKING_MODE="lock")
+    def test_lock_mode_with_batches(self):
+        self.assert_batch_and_single_bookings_agree()
+
+    @override_settings(RESERVATION_BOOKING_MODE="slot")
+    def test_slot_mode_with_batches(self):
+        self.assert_batch_and_single_bookings_agree()
+
+
+@override_settings(SQL_PROFILING_ENABLED=True)
+class QueryProfilingTests(ReservationTestCase):
+    def setUp(self):
+        super().setUp()
+        profiling.records.clear()
+
+    def test_server_timing_and_records(self):
+        self.reserve(9, 10)
+        response = self.client.get("/api/reservations/my/")
+
+        record = profiling.records[-1]
+        self.assertEqual(record["view"], "my_reservations")
+        self.assertGreater(record["queries"], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', response["Server-Timing"])
+
+    def test_streaming_response_recorded_after_output(self):
+        self.reserve(9, 10)
+        response = self.client.get(
+            "/api/reservations/grid/", {"date": self.date.isoformat()}
+        )
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(len(profiling.records), 0)
+
+        b"".join(response.streaming_content)
+        record = profiling.records[-1]
+        self.assertEqual(record["view"], "occupancy_grid")
+        self.assertGreater(record["queries"], 0)
+
+    def test_stats_view_is_admin_only(self):
+        self.client.get("/api/reservations/my/")
+        self.assertEqual(self.client.get("/api/debug/sql-stats/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        data = self.client.get("/api/debug/sql-stats/", {"reset": 1}).json()["data"]
+        self.assertEqual(data["views"]["my_reservations"]["requests"], 1)
+        self.assertEqual(len(profiling.records), 1)
+
+
+class OccupancyGridTests(ReservationTestCase):
+    def grid(self, **params):
+        response = self.client.get("/api/reservations/grid/", params)
+        if not response.streaming:
+            return response.json()
+        return json.loads(b"".join(response.streaming_content))
+
+    def test_masks_and_runs(self):
+        self.reserve(9, 11)
+        self.reserve(14, 15)
+        self.reserve(8, 9, date=self.date + timedelta(days=1))
+        self.reserve(10, 12, "CANCELED", room=self.other_room, sync=False)
+
+        data = self.grid(date=self.date.isoformat(), days=2)["data"]
+        self.assertEqual(
+            data["dates"],
+            [self.date.isoformat(), (self.date + timedelta(days=1)).isoformat()],
+        )
+        busy = {room["id"]: room["busy"] for room in data["rooms"]}
+        self.assertEqual(
+            busy[self.room.id],
+            [occupancy.hours_mask(9, 11) | occupancy.hours_mask(14, 15), 1 << 8],
+        )
+        self.assertEqual(busy[self.other_room.id], [0, 0])
+
+        data = self.grid(date=self.date.isoformat(), encoding="runs")["data"]
+        busy = {room["id"]: room["busy"] for room in data["rooms"]}
+        self.assertEqual(busy[self.room.id], [[[9, 11], [14, 15]]])
+
+    def test_capacity_filter_and_query_count(self):
+        MeetingRoom.objects.create(name="Big", capacity=50)
+        with self.assertNumQueries(2):
+            rooms = self.grid(date=self.date.isoformat(), people=20)["data"]["rooms"]
+        self.assertEqual([room["name"] for room in rooms], ["Big"])
+
+    def test_invalid_params(self):
+        day = self.date.isoformat()
+        self.assertEqual(self.grid(date="tomorrow")["code"], 400)
+        self.assertEqual(self.grid(date=day, days=0)["code"], 400)
+        self.assertEqual(self.grid(date=day, days=32)["code"], 400)
+        self.assertEqual(self.grid(date=day, encoding="bits")["code"], 400)
+
+
+class SlotSearchTests(ReservationTestCase):
+    def test_start_mask(self):
+        busy = occupancy.hours_mask(10, 12)
+        self.assertEqual(
+            occupancy.mask_hours(search.start_mask(busy, 2, 8, 14)), [8, 12]
+        )
+        self.assertEqual(search.start_mask(0, 3, 20, 22), 0)
+        self.assertEqual(search.start_mask(occupancy.FULL_DAY, 1), 0)
+
+    def test_find_free_slots_orders_by_date_hour_then_capacity(self):
+        big = MeetingRoom.objects.create(name="Big", capacity=50)
+        self.reserve(0, 24, room=self.other_room)
+        self.reserve(8, 10)
+
+        slots = search.find_free_slots(
+            2, 5, self.date, self.date, earliest=8, latest=18, limit=3
+        )
+        self.assertEqual(
+            [(room.id, hour) for room, _, hour in slots],
+            [(big.id, 8), (big.id, 9), (self.room.id, 10)],
+        )
+
+    def test_not_before_and_next_day(self):
+        self.reserve(0, 24, room=self.other_room)
+        slots = search.find_free_slots(
+            3,
+            1,
+            self.date,
+            self.date + timedelta(days=1),
+            latest=24,
+            limit=2,
+            not_before=(self.date, 22),
+        )
+        self.assertEqual(
+            [(date, hour) for _, date, hour in slots],
+            [(self.date + timedelta(days=1), 0), (self.date + timedelta(days=1), 0)],
+        )
+
+    def test_search_view(self):
+        self.reserve(9, 18)
+        result = self.client.post(
+            "/api/reservations/search/",
+            {
+                "duration": 2,
+                "people": 8,
+                "date_from": self.date.isoformat(),
+                "earliest_hour": 9,
+                "latest_hour": 18,
+                "limit": 1,
+            },
+            format="json",
+        ).json()
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(
+            [(s["room"]["id"], s["start_hour"], s["end_hour"]) for s in result["data"]],
+            [(self.other_room.id, 9, 11)],
+        )
+
+        bad = {"duration": 2, "people": 8, "date_from": "2000-01-01"}
+        result = self.client.post("/api/reservations/search/", bad, format="json")
+        self.assertEqual(result.json()["code"], 400)
+
+
+class AsyncViewTests(ReservationTestCase):
+    def setUp(self):
+        super().setUp()
+        token = UserRefreshToken.for_user(self.user).access_token
+        self.async_client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def check(self, start, end, people=3):
+        return {
+            "date": self.date.isoformat(),
+            "start_hour": start,
+            "end_hour": end,
+            "people": people,
+        }
+
+    def test_check_matches_sync_view(self):
+        self.reserve(9, 11)
+        body = self.check(10, 12)
+        sync = self.client.post("/api/reservations/check/", body, format="json")
+        result = self.async_client.post(
+            "/api/reservations/async/check/", body, content_type="application/json"
+        ).json()
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(result["data"], sync.json()["data"])
+        self.assertEqual([room["id"] for room in result["data"]], [self.other_room.id])
+
+    def test_multiple_checks(self):
+        self.reserve(9, 11)
+        result = self.async_client.post(
+            "/api/reservations/async/check/",
+            {"checks": [self.check(9, 10), self.check(11, 12), self.check(9, 10, 20)]},
+            content_type="application/json",
+        ).json()
+        self.assertEqual(
+            [[room["id"] for room in rooms] for rooms in result["data"]],
+            [[self.other_room.id], [self.room.id, self.other_room.id], []],
+        )
+
+        too_many = {"checks": [self.check(9, 10)] * 21}
+        result = self.async_client.post(
+            "/api/reservations/async/check/", too_many, content_type="application/json"
+        ).json()
+        self.assertEqual(result["code"], 400)
+
+    def test_my_reservations_matches_sync_view(self):
+        for day in range(3):
+            self.reserve(9, 10, date=self.date + timedelta(days=day))
+        sync = self.client.get("/api/reservations/my/", {"limit": 2}).json()
+        result = self.async_client.get("/api/reservations/async/my/", {"limit": 2})
+        self.assertEqual(result.json()["data"], sync["data"])
+
+        response = self.async_client.get(
+            "/api/reservations/async/my/",
+            {"limit": 2},
+            HTTP_IF_NONE_MATCH=result["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_requires_token(self):
+        response = Client().get("/api/reservations/async/my/")
+        self.assertEqual(response.status_code, 401)
+
+
+class RealtimeEventTests(ReservationTestCase):
+    def published(self, action):
+        """执行 action 并提交事务，返回推送的 {频道: [消息, ...]}"""
+        messages = {}
+        with mock.patch.object(get_broker(), "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        for channel, message in (c.args for c in publish.call_args_list):
+            messages.setdefault(channel, []).append(message)
+        return messages
+
+    def test_create_and_cancel_publish_to_date_and_user(self):
+        messages = self.published(lambda: self.create(9, 11))
+        date_channel = events.date_channel(self.date)
+        user_channel = events.user_channel(self.user.id)
+        self.assertEqual(set(messages), {date_channel, user_channel})
+
+        slot = messages[date_channel][0]
+        self.assertEqual(
+            (slot["event"], slot["start_hour"], slot["end_hour"]), ("created", 9, 11)
+        )
+        self.assertNotIn("topic", slot)
+        self.assertEqual(messages[user_channel][0]["topic"], "t")
+
+        r = Reservation.objects.get()
+        messages = self.published(
+            lambda: self.client.post(f"/api/reservations/{r.id}/cancel")
+        )
+        self.assertEqual(messages[date_channel][0]["event"], "canceled")
+        self.assertEqual(messages[date_channel][0]["id"], r.id)
+
+    def test_failed_and_suppressed_changes_are_not_published(self):
+        self.assertEqual(self.published(lambda: self.create(25, 26)), {})
+
+        def suppressed():
+            with events.suppressed():
+                events.publish(events.CREATED, [self.reserve(9, 10)])
+
+        self.assertEqual(self.published(suppressed), {})
+
+    def test_wsgi_requests_are_refused(self):
+        response = self.client.get(
+            "/api/reservations/stream/", {"date": self.date.isoformat()}
+        )
+        self.assertEqual(response.status_code, 401)
+
+        token = UserRefreshToken.for_user(self.user).access_token
+        response = Client().get(
+            "/api/reservations/stream/",
+            {"date": self.date.isoformat(), "token": str(token)},
+        )
+        self.assertEqual(response.status_code, 501)
+
+    def test_asgi_requests_get_an_event_stream(self):
+        request = AsyncRequestFactory().get("/api/reservations/stream/")
+        response = async_views.sse_response(request, ["date:2030-01-01"])
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        response.close()
+
+
+class EventStreamTests(SimpleTestCase):
+    async def test_ready_then_events(self):
+        stream = async_views.event_stream(["date:2030-01-01"])
+        self.assertIn("event: ready", await anext(stream))
+
+        get_broker().publish("date:2030-01-01", {"event": "created", "id": 1})
+        get_broker().publish("date:2030-01-02", {"event": "created", "id": 2})
+        chunk = await anext(stream)
+        await stream.aclose()
+
+        self.assertTrue(chunk.startswith("event: created\ndata: "))
+        self.assertEqual(json.loads(chunk.split("data: ")[1])["id"], 1)
+        self.assertEqual(get_broker().subscriber_count(), 0)
+
+    @override_settings(REALTIME_HEARTBEAT=0.01)
+    async def test_heartbeat_and_resync(self):
+        stream = async_views.event_stream(["date:2030-01-01"])
+        await anext(stream)
+        self.assertEqual(await anext(stream), ": ping\n\n")
+
+        broker = get_broker()
+        for i in range(broker.queue_size + 1):
+            broker.publish("date:2030-01-01", {"event": "created", "id": i})
+        # 投递经由 call_soon_threadsafe，先让事件循环处理完
+        await asyncio.sleep(0)
+        self.assertIn("event: resync", await anext(stream))
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+
+
+class LifecycleTests(ReservationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.make_aware(datetime(2030, 5, 10, 10, 20))
+        self.today = self.now.date()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def test_sweep(self):
+        expired_yesterday = self.reserve(9, 10, date=self.yesterday)
+        expired_today = self.reserve(9, 10, date=self.today)
+        pending = self.reserve(10, 11, date=self.today)
+        no_show = self.reserve(8, 9, "APPROVED", date=self.today)
+        approved = self.reserve(12, 13, "APPROVED", date=self.today)
+        completed = self.reserve(14, 15, "USED", date=self.yesterday)
+        in_use = self.reserve(9, 11, "USED", room=self.other_room, date=self.today)
+
+        expected = {"expire": 2, "no_show": 1, "complete": 1}
+        self.assertEqual(lifecycle.sweep(now=self.now, dry_run=True), expected)
+        self.assertEqual(lifecycle.sweep(now=self.now, batch_size=1), expected)
+
+        statuses = dict(Reservation.objects.values_list("id", "status"))
+        self.assertEqual(
+            [
+                statuses[r.id]
+                for r in (
+                    expired_yesterday,
+                    expired_today,
+                    pending,
+                    no_show,
+                    approved,
+                    completed,
+                    in_use,
+                )
+            ],
+            [
+                "EXPIRED",
+                "EXPIRED",
+                "PENDING",
+                "NO_SHOW",
+                "APPROVED",
+                "COMPLETED",
+                "USED",
+            ],
+        )
+        self.assertTrue(occupancy.is_free(self.room.id, self.today, 8, 9))
+        self.assertFalse(occupancy.is_free(self.other_room.id, self.today, 9, 11))
+        self.assertEqual(occupancy.diff(), [])
+
+    def test_pending_survives_its_start_hour(self):
+        # 当前这个小时可以预约，在这个小时结束前不应过期
+        r = self.reserve(10, 11, date=self.today)
+        for minute in (0, 20, 59):
+            now = self.now.replace(minute=minute)
+            self.assertEqual(lifecycle.sweep(now=now)["expire"], 0)
+        r.refresh_from_db()
+        self.assertEqual(r.status, "PENDING")
+
+        self.assertEqual(lifecycle.sweep(now=self.now.replace(hour=11))["expire"], 1)
+        r.refresh_from_db()
+        self.assertEqual(r.status, "EXPIRED")
+
+    def test_no_show_grace(self):
+        self.reserve(10, 11, "APPROVED", date=self.today)
+        with override_settings(RESERVATION_NO_SHOW_GRACE_MINUTES=30):
+            self.assertEqual(lifecycle.sweep(now=self.now)["no_show"], 0)
+        self.assertEqual(lifecycle.sweep(now=self.now)["no_show"], 1)
+
+    def test_confirm_after_no_show_is_rejected(self):
+        r = self.reserve(10, 11, "APPROVED", date=self.today)
+        lifecycle.sweep(now=self.now)
+
+        response = self.client.post(f"/api/reservations/{r.id}/confirm")
+        self.assertEqual(response.json()["code"], 400)
+        r.refresh_from_db()
+        self.assertEqual(r.status, "NO_SHOW")
+        self.assertTrue(occupancy.is_free(self.room.id, self.today, 10, 11))
+
+
+class ArchiveTests(ReservationTestCase):
+    def test_archive_moves_finished_rows(self):
+        old = timezone.localdate() - timedelta(days=400)
+        finished = [
+            self.reserve(9, 10, "COMPLETED", date=old + timedelta(days=i)).id
+            for i in range(5)
+        ]
+        active = self.reserve(11, 12, "USED", date=old)
+        recent = self.reserve(9, 10, "CANCELED", date=timezone.localdate())
+
+        self.assertEqual(archive.archivable(archive.cutoff()).count(), 5)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(archive.archive(batch_size=2), 5)
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "room_daily_usage" in q["sql"]]
+        )
+
+        self.assertEqual(
+            sorted(ArchivedReservation.objects.values_list("id", flat=True)), finished
+        )
+        self.assertEqual(
+            set(Reservation.objects.values_list("id", flat=True)),
+            {active.id, recent.id},
+        )
+        self.assertEqual(archive.archive(), 0)
+
+    def test_archived_rows_are_listed_separately(self):
+        old = timezone.localdate() - timedelta(days=400)
+        self.reserve(9, 10, "COMPLETED", date=old)
+        self.reserve(9, 10)
+        archive.archive()
+
+        hot = self.client.get("/api/reservations/my/").json()["data"]["results"]
+        cold = self.client.get("/api/reservations/my/", {"archived": 1}).json()
+        self.assertEqual(len(hot), 1)
+        self.assertEqual(len(cold["data"]["results"]), 1)
+
+
+class ExportTests(ReservationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+
+    def export(self, **params):
+        response = self.client.get("/api/reservations/export/", params)
+        if not response.streaming:
+            return response, response.json()
+        return response, b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv(self):
+        r = self.reserve(9, 11, "APPROVED")
+        response, body = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="reservations.csv"', response["Content-Disposition"])
+
+        self.assertTrue(body.startswith("\ufeff"))
+        rows = list(csv.reader(io.StringIO(body.lstrip("\ufeff"))))
+        self.assertEqual(rows[0], export.HEADER)
+        record = dict(zip(rows[0], rows[1]))
+        self.assertEqual(
+            (record["id"], record["username"], record["room"], record["hours"]),
+            (str(r.id), "alice", "A", "2"),
+        )
+        self.assertEqual(record["status_display"], "已通过")
+
+    def test_jsonl_with_filters(self):
+        self.reserve(9, 10)
+        kept = self.reserve(10, 11, "APPROVED", room=self.other_room)
+        self.reserve(11, 12, "APPROVED", date=self.date + timedelta(days=1))
+
+        response, body = self.export(
+            type="jsonl",
+            status="APPROVED",
+            room=str(self.other_room.id),
+            date_to=self.date.isoformat(),
+        )
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([x["id"] for x in records], [kept.id])
+        self.assertEqual(records[0]["date"], self.date.isoformat())
+
+    def test_archived_rows_on_request(self):
+        old = timezone.localdate() - timedelta(days=400)
+        archived = self.reserve(9, 10, "COMPLETED", date=old)
+        hot = self.reserve(9, 10)
+        archive.archive()
+
+        _, body = self.export(type="jsonl")
+        self.assertEqual([json.loads(x)["id"] for x in body.splitlines()], [hot.id])
+        _, body = self.export(type="jsonl", archived=1)
+        self.assertEqual(
+            [json.loads(x)["id"] for x in body.splitlines()], [hot.id, archived.id]
+        )
+
+    def test_reads_in_primary_key_chunks(self):
+        ids = [
+            self.reserve(9, 10, date=self.date + timedelta(days=i)).id for i in range(5)
+        ]
+        # 每段一条查询；最后一段不满时结束
+        with self.assertNumQueries(3):
+            records = list(
+                export.iter_records([Reservation.objects.all()], chunk_size=2)
+            )
+        self.assertEqual([x["id"] for x in records], ids)
+
+    def test_bad_params_and_permissions(self):
+        self.assertEqual(self.export(type="xlsx")[1]["code"], 400)
+        self.assertEqual(self.export(date_from="2030/01/01")[1]["code"], 400)
+
+        self.user.is_staff = False
+        self.user.save(update_fields=["is_staff"])
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.export()[0].status_code, 403)
+
+
+class UsageRollupTests(ReservationTestCase):
+    def usage(self, room=None, date=None):
+        return RoomDailyUsage.objects.get(
+            room=room or self.room, date=date or self.date
+        )
+
+    def test_refresh_counts_hours_by_status(self):
+        self.reserve(8, 10, "USED")
+        self.reserve(10, 11, "APPROVED")
+        self.reserve(11, 12, "CANCELED")
+        self.reserve(12, 14, "NO_SHOW")
+        self.reserve(14, 15, "EXPIRED")
+
+        self.assertEqual(analytics.refresh(), 1)
+        day = self.usage()
+        self.assertEqual(
+            (day.booked_hours, day.used_hours, day.canceled_hours, day.no_show_hours),
+            (5, 2, 1, 2),
+        )
+        self.assertEqual(
+            day.booked_mask, occupancy.hours_mask(8, 11) | occupancy.hours_mask(12, 14)
+        )
+
+    def test_refresh_only_recomputes_changed_days(self):
+        first = self.reserve(9, 10)
+        self.reserve(9, 10, date=self.date + timedelta(days=1))
+        self.assertEqual(analytics.refresh(), 2)
+
+        # 早于水位线（减去回退时间）的预约不再重算
+        Reservation.objects.filter(id=first.id).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(analytics.refresh(), 1)
+
+        first.status = "APPROVED"
+        first.save()
+        self.assertEqual(analytics.refresh(), 2)
+
+    def test_delete_marks_day_dirty(self):
+        r = self.reserve(9, 10)
+        analytics.refresh()
+        r.delete()
+        self.assertTrue(self.usage().dirty)
+
+        analytics.refresh()
+        self.assertFalse(RoomDailyUsage.objects.exists())
+
+    def test_bulk_delete_marks_dirty_in_one_update(self):
+        for day in range(3):
+            self.reserve(9, 10, date=self.date + timedelta(days=day))
+        analytics.refresh()
+
+        with CaptureQueriesContext(connection) as ctx:
+            with analytics.batched_dirty():
+                for r in Reservation.objects.all():
+                    r.delete()
+        updates = [
+            q
+            for q in ctx.captured_queries
+            if q["sql"].startswith("UPDATE") and "room_daily_usage" in q["sql"]
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(RoomDailyUsage.objects.filter(dirty=True).count(), 3)
+
+    def test_report_reads_rollups_only(self):
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        self.reserve(9, 11, "USED")
+        self.reserve(10, 11, room=self.other_room)
+        analytics.refresh()
+
+        params = {"date_from": self.date.isoformat(), "date_to": self.date.isoformat()}
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/reservations/usage/", params).json()["data"]
+        tables = {
+            connection.ops.quote_name(t) for t in ("reservation", "reservation_archive")
+        }
+        self.assertFalse(
+            [q for q in ctx.captured_queries if tables & set(q["sql"].split())]
+        )
+
+        self.assertEqual(
+            [(r["room_id"], r["booked_hours"]) for r in data["by_room"]],
+            [(self.room.id, 2), (self.other_room.id, 1)],
+        )
+        self.assertEqual(data["by_room"][0]["occupancy_rate"], round(2 / 14, 4))
+        self.assertEqual([h["booked"] for h in data["by_hour"][8:12]], [0, 1, 2, 0])
+
+    def test_report_params_and_permissions(self):
+        def get(**params):
+            return self.client.get("/api/reservations/usage/", params)
+
+        self.assertEqual(get(date_from=self.date.isoformat()).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        self.assertEqual(get(date_from=self.date.isoformat()).json()["code"], 400)
+        self.assertEqual(
+            get(
+                date_from=self.date.isoformat(),
+                date_to=(self.date - timedelta(days=1)).isoformat(),
+            ).json()["code"],
+            400,
+        )
+
+
+class AdminChangelistTests(ReservationTestCase):
+    url = "/admin/reservations/reservation/"
+
+    def setUp(self):
+        super().setUp()
+        self.admin = Client()
+        self.admin.force_login(
+            User.objects.create_superuser("root", password="pw", email="")
+        )
+
+    @override_settings(ADMIN_RECENT_DAYS=7)
+    def test_defaults_to_recent_dates(self):
+        response = self.admin.get(self.url)
+        since = timezone.localdate() - timedelta(days=7)
+        self.assertRedirects(
+            response,
+            f"{self.url}?date__gte={since.isoformat()}",
+            fetch_redirect_response=False,
+        )
+        # 在列表页内回到无条件列表时不再跳转
+        response = self.admin.get(self.url, HTTP_REFERER=f"http://testserver{self.url}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_independent_of_rows(self):
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.admin.get(self.url, {"status": "PENDING"})
+            self.assertEqual(response.status_code, 200)
+            return len(ctx)
+
+        self.reserve(9, 10)
+        one = queries()
+        for day in range(1, 10):
+            user = User.objects.create_user(f"u{day}", password="pw")
+            r = self.reserve(9, 10, date=self.date + timedelta(days=day))
+            Reservation.objects.filter(id=r.id).update(user=user)
+        self.assertEqual(queries(), one)
+
+    @override_settings(ADMIN_COUNT_LIMIT=3)
+    def test_count_is_bounded(self):
+        for day in range(5):
+            self.reserve(9, 10, date=self.date + timedelta(days=day))
+
+        queryset = Reservation.objects.order_by("id")
+        # SQLite 没有表统计信息，按上限计数
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 3)
+        self.assertEqual(
+            EstimatedCountPaginator(queryset.filter(start_hour=9), 2).count, 3
+        )
+        self.assertEqual(
+            EstimatedCountPaginator(queryset.filter(date=self.date), 2).count, 1
+        )
+
+
+class ConflictTests(ReservationTestCase):
+    def test_validate_hours(self):
+        conflicts.validate_hours(0, 24)
+        for start, end in [(-1, 3), (9, 25), (10, 10), (11, 10)]:
+            with self.assertRaises(ValueError):
+                conflicts.validate_hours(start, end)
+
+    def test_find_conflict_loads_user_in_one_query(self):
+        existing = self.reserve(9, 11, status="APPROVED")
+        self.reserve(11, 12, status="CANCELED")
+
+        with self.assertNumQueries(1):
+            conflict = conflicts.find_conflict(self.room.id, self.date, 10, 12)
+            message = conflicts.describe(conflict)
+        self.assertEqual(conflict.id, existing.id)
+        self.assertEqual(message, "时间冲突：alice 9:00-11:00")
+
+        self.assertIsNone(conflicts.find_conflict(self.room.id, self.date, 11, 13))
+        self.assertIsNone(conflicts.find_conflict(self.other_room.id, self.date, 9, 11))
+        self.assertIsNone(
+            conflicts.find_conflict(
+                self.room.id, self.date, 9, 12, exclude_id=existing.id
+            )
+        )
+
+    def test_has_conflict_uses_occupancy(self):
+        self.reserve(9, 11)
+        self.assertTrue(conflicts.has_conflict(self.room.id, self.date, 10, 11))
+        self.assertFalse(conflicts.has_conflict(self.room.id, self.date, 11, 12))
+
+    def test_memory_index_follows_writes(self):
+        index = conflicts.MemoryIndex()
+        index.warm()
+        self.assertTrue(index.is_free(self.room.id, self.date, 9, 11))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book_room(self.user, self.room, self.date, 9, 11, "t")
+
+
+class AdminFormTests(ReservationTestCase):
+    def form(self, instance=None, **fields):
+        data = {
+            "user": self.user.id,
+            "room": self.room.id,
+            "date": self.date.isoformat(),
+            "start_hour": 9,
+            "end_hour": 10,
+            "topic": "t",
+            "status": "PENDING",
+            "reject_reason": "",
+        }
+        data.update(fields)
+        return ReservationAdminForm(data, instance=instance)
+
+    def test_conflict_names_the_existing_booking(self):
+        self.reserve(9, 11, "APPROVED")
+        form = self.form(start_hour=10, end_hour=12)
+        self.assertFalse(form.is_valid())
+        self.assertIn("时间冲突：alice 9:00-11:00", form.non_field_errors())
+
+    def test_transitions_use_the_current_row(self):
+        # 表单加载时还是 PENDING，提交前已被用户取消
+        r = self.reserve(9, 10)
+        form = self.form(instance=r, status="APPROVED")
+        Reservation.objects.filter(id=r.id).update(status="CANCELED")
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("非法状态流转：CANCELED → APPROVED", form.non_field_errors())
+
+    def test_deleted_row(self):
+        r = self.reserve(9, 10)
+        form = self.form(instance=r, status="APPROVED")
+        Reservation.objects.filter(id=r.id).delete()
+        self.assertFalse(form.is_valid())
+        self.assertIn("该预约已被删除", form.non_field_errors())
+
+
+class ConflictIndexTests(ReservationTestCase):
+    def test_memory_index_follows_writes(self):
+        index = conflicts.MemoryIndex()
+        index.warm()
+        self.assertTrue(index.is_free(self.room.id, self.date, 9, 11))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book_room(self.user, self.room, self.date, 9, 11, "t")
+        self.assertFalse(index.is_free(self.room.id, self.date, 10, 11))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertFalse(index.is_free(self.room.id, self.date, 9, 10))
+        self.assertEqual(len(ctx), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.get().delete()
+        self.assertTrue(index.is_free(self.room.id, self.date, 9, 11))
+
+    @override_settings(
+        RESERVATION_CONFLICT_INDEX_WARM_DAYS=2, RESERVATION_CONFLICT_INDEX_MAX_DAYS=3
+    )
+    def test_memory_index_is_bounded(self):
+        index = conflicts.MemoryIndex()
+        for days in range(100, 110):
+            index.is_free(self.room.id, self.date + timedelta(days=days), 9, 10)
+        self.assertEqual(len(index._days), 3)
+
+    def test_database_index(self):
+        index = conflicts.DatabaseIndex()
+        self.reserve(9, 11)
+        self.assertFalse(index.is_free(self.room.id, self.date, 10, 11))
+        self.assertEqual(index.day_masks(self.date), {self.room.id: 0b11 << 9})
+
+    def test_backends_must_implement_day_masks(self):
+        class Incomplete(conflicts.ConflictIndex):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+@override_settings(AVAILABILITY_CAPACITY_BUCKETS=[1, 5, 10, 20])
+class AvailabilityCacheTests(ReservationTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.large = MeetingRoom.objects.create(name="C", capacity=30)
+        self.calls = 0
+
+    def find_rooms(self, *args):
+        self.calls += 1
+        return filter_available_rooms(*args)
+
+    def names(self, people, start=9, end=10):
+        rooms = availability.available_rooms(
+            self.date, start, end, people, find_rooms=self.find_rooms
+        )
+        return [room["name"] for room in rooms]
+
+    def test_shared_per_capacity_bucket(self):
+        self.assertEqual(self.names(12), ["C"])
+        # 同一档位（10）命中缓存，再按实际人数过滤
+        self.assertEqual(self.names(10), ["A", "B", "C"])
+        self.assertEqual(self.names(15), ["C"])
+        self.assertEqual(self.calls, 1)
+
+        self.assertEqual(self.names(3), ["A", "B", "C"])
+        self.assertEqual(self.calls, 2)
+
+    def test_writes_invalidate_results(self):
+        self.assertEqual(self.names(3), ["A", "B", "C"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.create(9, 10), 0)
+        self.assertEqual(self.names(3), ["B", "C"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.large.is_available = False
+            self.large.save()
+        self.assertEqual(self.names(3), ["B"])
+        self.assertEqual(self.calls, 3)
+
+    def compute_concurrently(self, waiters):
+        """第一个线程阻塞在计算中，其余线程同时未命中"""
+        entered, release = threading.Semaphore(0), threading.Event()
+
+        def slow():
+            self.calls += 1
+            entered.release()
+            release.wait(5)
+            return [{"name": "C", "capacity": 30}]
+
+        results = []
+        key = availability.cache_key(self.date, 9, 10, 1)
+
+        def run():
+            results.append(availability._single_flight(key, slow))
+
+        leader = threading.Thread(target=run)
+        leader.start()
+        entered.acquire(timeout=5)
+        threads = [threading.Thread(target=run) for _ in range(waiters)]
+        for t in threads:
+            t.start()
+        return [leader, *threads], entered, release, results
+
+    def test_concurrent_misses_compute_once(self):
+        threads, _, release, results = self.compute_concurrently(3)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.names(1), ["C"])
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(AVAILABILITY_CACHE_WAIT=0.01)
+    def test_waiters_compute_after_timeout(self):
+        threads, entered, release, results = self.compute_concurrently(1)
+        # 等待超时的线程自行计算
+        self.assertTrue(entered.acquire(timeout=5))
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(availability._inflight, {})
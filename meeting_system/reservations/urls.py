@@ -1,16 +1,38 @@
 from django.urls import path
+from .async_views import (
+    check_available_async_view,
+    date_stream_view,
+    my_reservations_async_view,
+    my_stream_view,
+)
 from .views import (
     check_available_view,
     create_reservation_view,
+    create_batch_reservation_view,
     my_reservations_view,
+    occupancy_grid_view,
+    search_slots_view,
+    export_reservations_view,
+    usage_report_view,
     cancel_reservation_view,
     confirm_use_view,
 )
 
 urlpatterns = [
-    path("check/", check_available_view),
-    path("create/", create_reservation_view),
-    path("my/", my_reservations_view),
-    path("<int:res_id>/cancel", cancel_reservation_view),
-    path("<int:res_id>/confirm", confirm_use_view),
+    path("check/", check_available_view, name="check_available"),
+    path("create/", create_reservation_view, name="create_reservation"),
+    path(
+        "create/batch/", create_batch_reservation_view, name="create_batch_reservation"
+    ),
+    path("my/", my_reservations_view, name="my_reservations"),
+    path("grid/", occupancy_grid_view, name="occupancy_grid"),
+    path("search/", search_slots_view, name="search_slots"),
+    path("export/", export_reservations_view, name="export_reservations"),
+    path("usage/", usage_report_view, name="usage_report"),
+    path("async/check/", check_available_async_view, name="check_available_async"),
+    path("async/my/", my_reservations_async_view, name="my_reservations_async"),
+    path("stream/", date_stream_view, name="date_stream"),
+    path("stream/my/", my_stream_view, name="my_stream"),
+    path("<int:res_id>/cancel", cancel_reservation_view, name="cancel_reservation"),
+    path("<int:res_id>/confirm", confirm_use_view, name="confirm_use"),
 ]
@@ -1,11 +1,34 @@
-from datetime import datetime
-from django.db import transaction
-from django.db.models import Q
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from rest_framework.decorators import api_view
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from reservations.models import Reservation
-
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from meeting_system.conditional import not_modified, queryset_version, set_validators
+from reservations import (
+    analytics,
+    availability,
+    batch,
+    conflicts,
+    events,
+    export,
+    grid,
+    occupancy,
+    search,
+)
+from reservations.models import ArchivedReservation, Reservation, RoomOccupancy
+
+from rooms.catalog import get_catalog_version
 from rooms.models import MeetingRoom
 from rooms.serializers import MeetingRoomSerializer
 
@@ -17,11 +40,7 @@ def validate_date_and_time(reserve_date, start_hour, end_hour):
     if reserve_date < today:
         raise ValueError("预约日期不能早于今天")
 
-    if start_hour < 0 or end_hour > 24:
-        raise ValueError("小时必须在 0-24 范围内")
-
-    if start_hour >= end_hour:
-        raise ValueError("结束时间必须晚于开始时间")
+    conflicts.validate_hours(start_hour, end_hour)
 
     if reserve_date == today and start_hour < now_hour:
         raise ValueError("当天预约开始时间不能早于当前时间")
@@ -36,31 +55,92 @@ def check_room_conflict(room_id: int, date: str, start: int, end: int) -> bool:
     """
     检查预约冲突
     True 表示有冲突，False 表示无冲突
-    检查时间段和状态为 PENDING、APPROVED、USED 的预约是否冲突
+    查会议室当天的占用位图（PENDING、APPROVED、USED 占用的小时），一次行查找 + 位与
     """
-    # 冲突逻辑：(Existing Start < New End) AND (Existing End > New Start)
-    # 引用原始逻辑
-    conflict_exists = (
-        Reservation.objects.filter(
-            room_id=room_id, date=date, status__in=["PENDING", "APPROVED", "USED"]
-        )
-        .filter(start_hour__lt=end, end_hour__gt=start)
-        .exists()
+    return conflicts.has_conflict(room_id, date, start, end)
+
+
+def available_rooms_queryset(date: str, start: int, end: int, people: int):
+    """
+    无冲突会议室的查询集
+    用 NOT EXISTS 反连接当天的占用位图，一次查出所有无冲突的会议室，
+    查询次数与会议室数量无关
+    """
+    busy = (
+        RoomOccupancy.objects.filter(room_id=OuterRef("pk"), date=date)
+        .annotate(clash=F("mask").bitand(occupancy.hours_mask(start, end)))
+        .exclude(clash=0)
+    )
+
+    return (
+        MeetingRoom.objects.filter(capacity__gte=people, is_available=True)
+        .filter(~Exists(busy))
+        .order_by("id")
     )
-    return conflict_exists
 
 
 def filter_available_rooms(date: str, start: int, end: int, people: int):
-    """筛选可用会议室（返回完整 MeetingRoom 对象）"""
-    candidates = MeetingRoom.objects.filter(capacity__gte=people, is_available=True)
+    """
+    筛选可用会议室（返回完整 MeetingRoom 对象）
+    冲突索引在数据库中时用一条反连接查询；否则只查会议室表，占用情况由索引在内存中判定
+    """
+    index = conflicts.get_index()
+    if isinstance(index, conflicts.DatabaseIndex):
+        return list(available_rooms_queryset(date, start, end, people))
+
+    masks = index.day_masks(date)
+    wanted = occupancy.hours_mask(start, end)
+    return [
+        room
+        for room in MeetingRoom.objects.filter(
+            capacity__gte=people, is_available=True
+        ).order_by("id")
+        if not masks.get(room.id, 0) & wanted
+    ]
 
-    available_rooms = []
 
-    for room in candidates:
-        if not check_room_conflict(room.id, date, start, end):
-            available_rooms.append(room)
+def book_room(user, room, reserve_date, start: int, end: int, topic) -> bool:
+    """
+    创建一条 PENDING 预约，时间段已被占用时返回 False
+    RESERVATION_BOOKING_MODE:
+      - "lock"：锁住会议室当天的位图行后检查再写入
+      - "slot"：不加锁读，直接插入时段行，由唯一约束拒绝重复占用；
+        位图行在事务外预先创建，事务内只在最后做一次按位或 UPDATE，
+        同一会议室当天的预约只在提交前的这一小段互相等待
+    """
+    mode = getattr(settings, "RESERVATION_BOOKING_MODE", "lock")
+
+    if mode == "slot":
+        occupancy.ensure_day(room.id, reserve_date)
+
+    with transaction.atomic():
+        if mode == "slot":
+            try:
+                with transaction.atomic():
+                    occupancy.claim_slots(room.id, reserve_date, start, end)
+            except IntegrityError:
+                return False
+        else:
+            # 只锁该会议室当天的位图行，避免范围锁（间隙锁）
+            day = occupancy.lock_day(room.id, reserve_date)
+            if day.mask & occupancy.hours_mask(start, end):
+                return False
+            occupancy.occupy(room.id, reserve_date, start, end)
+
+        reservation = Reservation.objects.create(
+            user_id=user.id,
+            room=room,
+            date=reserve_date,
+            start_hour=start,
+            end_hour=end,
+            topic=topic,
+            status="PENDING",
+        )
+        if mode == "slot":
+            occupancy.add_bits(room.id, reserve_date, occupancy.hours_mask(start, end))
+        events.publish(events.CREATED, [reservation])
 
-    return available_rooms
+    return True
 
 
 # ==========================================
@@ -92,14 +172,15 @@ def check_available_view(request):
 
         validate_date_and_time(reserve_date, start, end)
 
-        rooms = filter_available_rooms(reserve_date, start, end, people)
-        serializer = MeetingRoomSerializer(rooms, many=True).data
+        serializer = availability.available_rooms(
+            reserve_date, start, end, people, find_rooms=filter_available_rooms
+        )
 
         return Response({"code": 0, "msg": "ok", "data": serializer})
 
     except ValueError as e:
         return Response({"code": 400, "msg": str(e), "data": None})
-    except Exception as e:
+    except Exception:
         return Response({"code": 500, "msg": "服务器内部错误", "data": None})
 
 
@@ -134,32 +215,10 @@ def create_reservation_view(request):
             return Response({"code": 400, "msg": "会议室容量不足", "data": None})
 
         # ===============================
-        # 关键：原子事务
+        # 关键：原子事务（见 book_room）
         # ===============================
-        with transaction.atomic():
-            # 对可能冲突的记录加锁
-            conflict_qs = (
-                Reservation.objects.select_for_update()
-                .filter(
-                    room=room,
-                    date=reserve_date,
-                    status__in=["PENDING", "APPROVED", "USED"],
-                )
-                .filter(start_hour__lt=end, end_hour__gt=start)
-            )
-
-            if conflict_qs.exists():
-                return Response({"code": 409, "msg": "该时间段已被占用", "data": None})
-
-            Reservation.objects.create(
-                user=user,
-                room=room,
-                date=reserve_date,
-                start_hour=start,
-                end_hour=end,
-                topic=data["topic"],
-                status="PENDING",
-            )
+        if not book_room(user, room, reserve_date, start, end, data["topic"]):
+            return Response({"code": 409, "msg": "该时间段已被占用", "data": None})
 
         return Response({"code": 0, "msg": "预约提交成功，等待审批", "data": None})
 
@@ -167,15 +226,353 @@ def create_reservation_view(request):
         return Response({"code": 404, "msg": "会议室不存在或不可用", "data": None})
     except ValueError as e:
         return Response({"code": 400, "msg": str(e), "data": None})
-    except Exception as e:
+    except Exception:
+        return Response({"code": 500, "msg": "系统错误", "data": None})
+
+
+@api_view(["POST"])
+def create_batch_reservation_view(request):
+    """
+    POST /api/reservations/create/batch/
+    按重复规则（repeat）或显式时间段列表（slots）为同一会议室批量预约
+    """
+    try:
+        data = request.data
+
+        for f in ["room_id", "people"]:
+            if not data.get(f):
+                return Response({"code": 400, "msg": f"缺少参数: {f}", "data": None})
+
+        try:
+            room_id = int(data["room_id"])
+            people = int(data["people"])
+            if data.get("slots"):
+                slots = batch.parse_slots(data["slots"])
+            elif data.get("repeat"):
+                slots = batch.expand_recurrence(
+                    data["repeat"], int(data["start_hour"]), int(data["end_hour"])
+                )
+            else:
+                return Response(
+                    {"code": 400, "msg": "缺少参数: repeat 或 slots", "data": None}
+                )
+        except ValueError as e:
+            return Response({"code": 400, "msg": str(e), "data": None})
+        except Exception:
+            return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+        mode = data.get("mode", "all_or_nothing")
+        if mode not in ["all_or_nothing", "best_effort"]:
+            return Response({"code": 400, "msg": "mode 参数错误", "data": None})
+
+        room = MeetingRoom.objects.get(id=room_id, is_available=True)
+
+        if people > room.capacity:
+            return Response({"code": 400, "msg": "会议室容量不足", "data": None})
+
+        created, results = batch.create_batch(
+            request.user,
+            room,
+            slots,
+            data.get("topic"),
+            validate=validate_date_and_time,
+            all_or_nothing=mode == "all_or_nothing",
+        )
+
+        result_data = {"created": created, "results": results}
+        if not created:
+            return Response(
+                {
+                    "code": 409,
+                    "msg": "没有可预约的时间段，未创建任何预约",
+                    "data": result_data,
+                }
+            )
+
+        return Response(
+            {
+                "code": 0,
+                "msg": f"已提交 {created} 条预约，等待审批",
+                "data": result_data,
+            }
+        )
+
+    except MeetingRoom.DoesNotExist:
+        return Response({"code": 404, "msg": "会议室不存在或不可用", "data": None})
+    except Exception:
         return Response({"code": 500, "msg": "系统错误", "data": None})
 
 
 @api_view(["GET"])
-def my_reservations_view(request):
-    user = request.user
+def occupancy_grid_view(request):
+    """
+    GET /api/reservations/grid/?date=YYYY-MM-DD&days=7&people=10&encoding=mask|runs
+    返回所有可预约会议室在日期范围内每天 24 小时的占用情况（流式输出）
+    """
+    params = request.query_params
+
+    try:
+        date_from = datetime.strptime(params["date"], "%Y-%m-%d").date()
+        days = int(params.get("days", 1))
+        people = int(params.get("people", 0))
+    except Exception:
+        return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+    if not 1 <= days <= grid.MAX_GRID_DAYS:
+        return Response(
+            {
+                "code": 400,
+                "msg": f"天数必须在 1-{grid.MAX_GRID_DAYS} 之间",
+                "data": None,
+            }
+        )
+
+    # 不能用 format 作参数名，DRF 用它选择渲染器
+    encoding = params.get("encoding", "mask")
+    if encoding not in ["mask", "runs"]:
+        return Response({"code": 400, "msg": "encoding 参数错误", "data": None})
+
+    return StreamingHttpResponse(
+        grid.iter_grid(date_from, days, people, encoding),
+        content_type="application/json",
+    )
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, JWTAuthentication])
+@permission_classes([IsAdminUser])
+def export_reservations_view(request):
+    """
+    GET /api/reservations/export/?type=csv|jsonl&date_from=&date_to=&status=&room=&archived=1
+    仅管理员可用；流式输出预约明细（含会议室、预约人），边查边写
+    """
+    params = request.query_params
+
+    try:
+        filters = {
+            "date_from": (
+                datetime.strptime(params["date_from"], "%Y-%m-%d").date()
+                if params.get("date_from")
+                else None
+            ),
+            "date_to": (
+                datetime.strptime(params["date_to"], "%Y-%m-%d").date()
+                if params.get("date_to")
+                else None
+            ),
+            "statuses": params["status"].split(",") if params.get("status") else None,
+            "room_ids": (
+                [int(x) for x in params["room"].split(",")]
+                if params.get("room")
+                else None
+            ),
+        }
+    except Exception:
+        return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+    # 不能用 format 作参数名，DRF 用它选择渲染器
+    fmt = params.get("type", "csv")
+    if fmt not in export.FORMATS:
+        return Response({"code": 400, "msg": "type 参数错误", "data": None})
+
+    content, content_type = export.stream(
+        export.sources(archived=params.get("archived") in ("1", "true"), **filters),
+        fmt,
+    )
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="reservations.{fmt}"'
+    return response
+
 
-    records = Reservation.objects.filter(user=user).order_by("-date", "-start_hour")
+MAX_USAGE_REPORT_DAYS = 366
+
+
+@api_view(["GET"])
+@authentication_classes([SessionAuthentication, JWTAuthentication])
+@permission_classes([IsAdminUser])
+def usage_report_view(request):
+    """
+    GET /api/reservations/usage/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&room=1,2
+    仅管理员可用；按会议室、星期、小时统计使用情况，只读取日汇总表
+    """
+    params = request.query_params
+
+    try:
+        date_from = datetime.strptime(params["date_from"], "%Y-%m-%d").date()
+        date_to = datetime.strptime(params["date_to"], "%Y-%m-%d").date()
+        room_ids = (
+            [int(x) for x in params["room"].split(",")] if params.get("room") else None
+        )
+    except Exception:
+        return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+    if not 0 <= (date_to - date_from).days < MAX_USAGE_REPORT_DAYS:
+        return Response(
+            {
+                "code": 400,
+                "msg": f"日期范围必须在 1-{MAX_USAGE_REPORT_DAYS} 天之间",
+                "data": None,
+            }
+        )
+
+    return Response(
+        {
+            "code": 0,
+            "msg": "ok",
+            "data": analytics.report(date_from, date_to, room_ids),
+        }
+    )
+
+
+@api_view(["POST"])
+def search_slots_view(request):
+    """
+    POST /api/reservations/search/
+    在日期窗口内查找最早的 N 个（会议室, 日期, 开始时间）空闲时段
+    """
+    try:
+        data = request.data
+
+        try:
+            duration = int(data.get("duration"))
+            people = int(data.get("people"))
+            date_from = datetime.strptime(data["date_from"], "%Y-%m-%d").date()
+            date_to = (
+                datetime.strptime(data["date_to"], "%Y-%m-%d").date()
+                if data.get("date_to")
+                else date_from + timedelta(days=search.MAX_SEARCH_DAYS - 1)
+            )
+            earliest = int(data.get("earliest_hour", 0))
+            latest = int(data.get("latest_hour", 24))
+            limit = int(data.get("limit", 5))
+        except Exception:
+            return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+        if people <= 0:
+            return Response({"code": 400, "msg": "参会人数必须大于 0", "data": None})
+
+        if duration <= 0 or not 0 <= earliest < latest <= 24:
+            return Response({"code": 400, "msg": "时长或时间范围不合法", "data": None})
+
+        today = timezone.localdate()
+        if date_from < today:
+            return Response({"code": 400, "msg": "预约日期不能早于今天", "data": None})
+
+        if not 0 <= (date_to - date_from).days < search.MAX_SEARCH_DAYS:
+            return Response(
+                {
+                    "code": 400,
+                    "msg": f"搜索范围不能超过 {search.MAX_SEARCH_DAYS} 天",
+                    "data": None,
+                }
+            )
+
+        limit = max(1, min(limit, search.MAX_SEARCH_RESULTS))
+
+        slots = search.find_free_slots(
+            duration,
+            people,
+            date_from,
+            date_to,
+            earliest=earliest,
+            latest=latest,
+            limit=limit,
+            not_before=(today, timezone.localtime().hour),
+        )
+
+        rooms = MeetingRoomSerializer([room for room, _, _ in slots], many=True).data
+        result = [
+            {
+                "room": room_data,
+                "date": date,
+                "start_hour": start,
+                "end_hour": start + duration,
+            }
+            for room_data, (_, date, start) in zip(rooms, slots)
+        ]
+
+        return Response({"code": 0, "msg": "ok", "data": result})
+
+    except Exception:
+        return Response({"code": 500, "msg": "服务器内部错误", "data": None})
+
+
+MY_RESERVATIONS_PAGE_SIZE = 20
+MY_RESERVATIONS_MAX_PAGE_SIZE = 100
+
+
+def reservation_source(params):
+    """archived=1 时查询归档表中的历史预约，否则查询热表"""
+    if params.get("archived") in ("1", "true"):
+        return ArchivedReservation
+    return Reservation
+
+
+def encode_cursor(r) -> str:
+    """游标：最后一条记录的 (date, start_hour, id)"""
+    raw = f"{r.date.isoformat()}|{r.start_hour}|{r.id}"
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    raw = urlsafe_b64decode(cursor.encode()).decode()
+    date_str, start, pk = raw.split("|")
+    return datetime.strptime(date_str, "%Y-%m-%d").date(), int(start), int(pk)
+
+
+def my_reservations_queryset(user, params):
+    """
+    按查询参数构造“我的预约”查询，返回 (records, limit)
+    参数不合法时抛出异常
+    """
+    limit = int(params.get("limit", MY_RESERVATIONS_PAGE_SIZE))
+    limit = max(1, min(limit, MY_RESERVATIONS_MAX_PAGE_SIZE))
+
+    records = (
+        reservation_source(params)
+        .objects.filter(user_id=user.id)
+        .select_related("room")
+        .only(
+            "id",
+            "date",
+            "start_hour",
+            "end_hour",
+            "topic",
+            "status",
+            "approve_time",
+            "reject_reason",
+            "room__name",
+            "room__room_no",
+        )
+        .order_by("-date", "-start_hour", "-id")
+    )
+
+    if params.get("status"):
+        records = records.filter(status__in=params["status"].split(","))
+    if params.get("date_from"):
+        records = records.filter(
+            date__gte=datetime.strptime(params["date_from"], "%Y-%m-%d").date()
+        )
+    if params.get("date_to"):
+        records = records.filter(
+            date__lte=datetime.strptime(params["date_to"], "%Y-%m-%d").date()
+        )
+
+    if params.get("cursor"):
+        c_date, c_start, c_id = decode_cursor(params["cursor"])
+        records = records.filter(
+            Q(date__lt=c_date)
+            | Q(date=c_date, start_hour__lt=c_start)
+            | Q(date=c_date, start_hour=c_start, id__lt=c_id)
+        )
+
+    return records, limit
+
+
+def my_reservations_page(rows, limit) -> dict:
+    """rows 为多取一条的查询结果，多出的那条用于判断是否还有下一页"""
+    has_next = len(rows) > limit
+    page = rows[:limit]
 
     data = [
         {
@@ -188,25 +585,64 @@ def my_reservations_view(request):
             "approve_time": r.approve_time,
             "reject_reason": r.reject_reason,
         }
-        for r in records
+        for r in page
     ]
 
-    return Response({"code": 0, "msg": "ok", "data": data})
+    return {
+        "results": data,
+        "next_cursor": encode_cursor(page[-1]) if has_next else None,
+    }
+
+
+@api_view(["GET"])
+def my_reservations_view(request):
+    """
+    GET /api/reservations/my/
+    按 (date, start_hour, id) 倒序的游标分页，可选 status / date_from / date_to 过滤，
+    archived=1 查询已归档的历史预约
+    """
+    user = request.user
+
+    try:
+        records, limit = my_reservations_queryset(user, request.query_params)
+    except Exception:
+        return Response({"code": 400, "msg": "参数格式错误", "data": None})
+
+    # 版本戳覆盖该用户全部预约；查询参数不同视为不同表示，
+    # 会议室改名也会改变列表内容，因此带上会议室列表的版本
+    room_etag = get_catalog_version()
+    etag = queryset_version(
+        reservation_source(request.GET).objects.filter(user_id=user.id),
+        extra=f"{request.GET.urlencode()}|{room_etag}",
+    )
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_validators(response, etag)
+
+    # 多取一条判断是否还有下一页
+    page = my_reservations_page(list(records[: limit + 1]), limit)
+
+    response = Response({"code": 0, "msg": "ok", "data": page})
+    return set_validators(response, etag)
 
 
 @api_view(["POST"])
 def cancel_reservation_view(request, res_id):
     try:
-        r = Reservation.objects.get(id=res_id)
+        with transaction.atomic():
+            # 锁住预约行，防止并发取消重复释放位图
+            r = Reservation.objects.select_for_update().get(id=res_id)
 
-        if r.user != request.user:
-            return Response({"code": 403, "msg": "无权操作", "data": None})
+            if r.user_id != request.user.id:
+                return Response({"code": 403, "msg": "无权操作", "data": None})
 
-        if r.status not in ["PENDING", "APPROVED"]:
-            return Response({"code": 400, "msg": "当前状态不可取消", "data": None})
+            if r.status not in ["PENDING", "APPROVED"]:
+                return Response({"code": 400, "msg": "当前状态不可取消", "data": None})
 
-        r.status = "CANCELED"
-        r.save()
+            r.status = "CANCELED"
+            r.save()
+            occupancy.release(r.room_id, r.date, r.start_hour, r.end_hour)
+            events.publish(events.CANCELED, [r])
 
         return Response({"code": 0, "msg": "预约已取消", "data": None})
 
@@ -220,27 +656,33 @@ from django.utils import timezone
 @api_view(["POST"])
 def confirm_use_view(request, res_id):
     try:
-        r = Reservation.objects.get(id=res_id)
+        with transaction.atomic():
+            # 锁住预约行：run_lifecycle 可能同时把它标记为未使用并释放占用，
+            # 加锁后再判断状态，避免把已释放的预约改回 USED
+            r = Reservation.objects.select_for_update().get(id=res_id)
 
-        if r.user != request.user:
-            return Response({"code": 403, "msg": "无权操作", "data": None})
+            if r.user_id != request.user.id:
+                return Response({"code": 403, "msg": "无权操作", "data": None})
 
-        if r.status != "APPROVED":
-            return Response({"code": 400, "msg": "仅已审批可确认使用", "data": None})
+            if r.status != "APPROVED":
+                return Response(
+                    {"code": 400, "msg": "仅已审批可确认使用", "data": None}
+                )
 
-        now = timezone.localtime()
-        start_time = timezone.make_aware(
-            datetime.combine(r.date, datetime.min.time())
-        ) + timezone.timedelta(hours=r.start_hour)
+            now = timezone.localtime()
+            start_time = timezone.make_aware(
+                datetime.combine(r.date, datetime.min.time())
+            ) + timezone.timedelta(hours=r.start_hour)
 
-        # 允许前后 1 小时
-        # if abs((now - start_time).total_seconds()) > 3600:
-        #     return Response(
-        #         {"code": 400, "msg": "不在允许确认使用的时间范围内", "data": None}
-        #     )
+            # 允许前后 1 小时
+            # if abs((now - start_time).total_seconds()) > 3600:
+            #     return Response(
+            #         {"code": 400, "msg": "不在允许确认使用的时间范围内", "data": None}
+            #     )
 
-        r.status = "USED"
-        r.save()
+            r.status = "USED"
+            r.save(update_fields=["status", "updated_at"])
+            events.publish(events.USED, [r])
 
         return Response({"code": 0, "msg": "确认使用成功", "data": None})
 
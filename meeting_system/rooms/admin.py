@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
+from .catalog import invalidate_catalog
 from .models import MeetingRoom
 
 
@@ -22,6 +25,9 @@ class MeetingRoomAdmin(admin.ModelAdmin):
     # (功能 1) 搜索框：搜索名称和用途
     search_fields = ("name", "usage")
 
+    # 预约表单的会议室搜索框按此排序分页
+    ordering = ("name",)
+
     # 允许在列表页直接修改是否可预约
     list_editable = ("is_available",)
 
@@ -55,11 +61,14 @@ class MeetingRoomAdmin(admin.ModelAdmin):
     # (功能 10) 自定义动作：批量设置为可预约
     @admin.action(description="批量设为可预约")
     def make_available(self, request, queryset):
-        queryset.update(is_available=True)
+        queryset.update(is_available=True, updated_at=timezone.now())
+        # update() 不触发 post_save，需手动失效列表缓存
+        transaction.on_commit(invalidate_catalog)
 
     # (功能 10) 自定义动作：批量设为不可预约
     @admin.action(description="批量设为不可预约")
     def make_unavailable(self, request, queryset):
-        queryset.update(is_available=False)
+        queryset.update(is_available=False, updated_at=timezone.now())
+        transaction.on_commit(invalidate_catalog)
 
     actions = [make_available, make_unavailable]
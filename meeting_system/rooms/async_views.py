@@ -0,0 +1,18 @@
+from meeting_system.asyncapi import api_response, async_api_view
+from meeting_system.conditional import not_modified, set_validators
+from .catalog import aget_catalog, aget_catalog_version
+
+
+@async_api_view(["GET"])
+async def room_list_async_view(request):
+    """
+    GET /api/rooms/async/list/
+    room_list_view 的原生异步版本
+    """
+    etag = await aget_catalog_version()
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_validators(response, etag)
+
+    response = api_response(data=await aget_catalog(request))
+    return set_validators(response, etag)
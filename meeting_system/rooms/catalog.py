@@ -0,0 +1,115 @@
+"""
+会议室列表缓存
+
+列表序列化结果按 scheme://host 分别缓存（图片地址是绝对 URL），
+会议室有任何变动时递增版本号，所有 host 的旧缓存随之失效。
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+from meeting_system.conditional import aqueryset_version, queryset_version
+
+from .models import MeetingRoom
+from .serializers import MeetingRoomSerializer
+
+VERSION_KEY = "rooms:catalog:version"
+
+
+def _cache():
+    return caches[getattr(settings, "ROOM_CATALOG_CACHE", "default")]
+
+
+def _version(cache) -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def catalog_version() -> int:
+    """会议室变动的版本号，其他依赖会议室数据的缓存可将其放进缓存键"""
+    return _version(_cache())
+
+
+def get_catalog_version():
+    """列表的版本戳（ETag），与列表缓存共用版本号"""
+    cache = _cache()
+    key = f"rooms:catalog:{_version(cache)}:etag"
+
+    stamp = cache.get(key)
+    if stamp is None:
+        stamp = queryset_version(MeetingRoom.objects.all())
+        cache.set(
+            key, stamp, timeout=getattr(settings, "ROOM_CATALOG_CACHE_TIMEOUT", 3600)
+        )
+    return stamp
+
+
+def get_catalog(request) -> list:
+    """返回序列化后的会议室列表，命中缓存时不查库"""
+    cache = _cache()
+    key = f"rooms:catalog:{_version(cache)}:{request.scheme}://{request.get_host()}"
+
+    data = cache.get(key)
+    if data is None:
+        data = MeetingRoomSerializer(
+            MeetingRoom.objects.all(), many=True, context={"request": request}
+        ).data
+        cache.set(
+            key, data, timeout=getattr(settings, "ROOM_CATALOG_CACHE_TIMEOUT", 3600)
+        )
+    return data
+
+
+async def _aversion(cache) -> int:
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, 1, timeout=None)
+        version = await cache.aget(VERSION_KEY, 1)
+    return version
+
+
+async def aget_catalog_version():
+    """get_catalog_version 的异步版本"""
+    cache = _cache()
+    key = f"rooms:catalog:{await _aversion(cache)}:etag"
+
+    stamp = await cache.aget(key)
+    if stamp is None:
+        stamp = await aqueryset_version(MeetingRoom.objects.all())
+        await cache.aset(
+            key, stamp, timeout=getattr(settings, "ROOM_CATALOG_CACHE_TIMEOUT", 3600)
+        )
+    return stamp
+
+
+async def aget_catalog(request) -> list:
+    """get_catalog 的异步版本，未命中缓存时用异步 ORM 读取"""
+    cache = _cache()
+    key = (
+        f"rooms:catalog:{await _aversion(cache)}:"
+        f"{request.scheme}://{request.get_host()}"
+    )
+
+    data = await cache.aget(key)
+    if data is None:
+        rooms = [room async for room in MeetingRoom.objects.all().aiterator()]
+        data = MeetingRoomSerializer(
+            rooms, many=True, context={"request": request}
+        ).data
+        await cache.aset(
+            key, data, timeout=getattr(settings, "ROOM_CATALOG_CACHE_TIMEOUT", 3600)
+        )
+    return data
+
+
+def invalidate_catalog():
+    """会议室变动后调用，使所有 host 的缓存失效"""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # 版本号不存在（缓存被清空或已过期），重新写入即可
+        cache.add(VERSION_KEY, 1, timeout=None)
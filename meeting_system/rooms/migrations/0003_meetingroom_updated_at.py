@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 08:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rooms', '0002_alter_meetingroom_options_meetingroom_area_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meetingroom',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='更新时间'),
+            preserve_default=False,
+        ),
+    ]
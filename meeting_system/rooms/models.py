@@ -14,6 +14,7 @@ class MeetingRoom(models.Model):
         max_length=500, null=True, blank=True, verbose_name="图片URL"
     )
     is_available = models.BooleanField(default=True, verbose_name="是否可预约")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
 
     def __str__(self):
         # 如果有房号，显示 "大会议室 (101)"，否则只显示 "大会议室"
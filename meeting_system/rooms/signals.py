@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import MeetingRoom
+
+
+@receiver(post_save, sender=MeetingRoom)
+@receiver(post_delete, sender=MeetingRoom)
+def invalidate_room_catalog(sender, **kwargs):
+    """事务提交后再失效，避免并发请求把提交前的旧数据写回缓存"""
+    transaction.on_commit(invalidate_catalog)
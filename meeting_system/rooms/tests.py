@@ -1,3 +1,84 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from users.tokens import UserRefreshToken
+
+from .models import MeetingRoom
+
+
+class RoomCatalogTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def add_room(self, name, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return MeetingRoom.objects.create(name=name, capacity=10, **fields)
+
+    def rooms(self, **extra):
+        return self.client.get("/api/rooms/list/", **extra).json()["data"]
+
+
+class RoomCatalogTests(RoomCatalogTestCase):
+    @override_settings(ALLOWED_HOSTS=["testserver", "other"])
+    def test_list_is_cached_per_host(self):
+        self.add_room("A", photo="rooms/a.jpg")
+
+        self.assertEqual(
+            self.rooms()[0]["photo"], "http://testserver/media/rooms/a.jpg"
+        )
+        with self.assertNumQueries(0):
+            self.rooms()
+        self.assertEqual(
+            self.rooms(HTTP_HOST="other:8000")[0]["photo"],
+            "http://other:8000/media/rooms/a.jpg",
+        )
+
+    def test_changes_invalidate_cache(self):
+        room = self.add_room("A")
+        self.assertEqual(len(self.rooms()), 1)
+
+        self.add_room("B")
+        self.assertEqual(len(self.rooms()), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.name = "A2"
+            room.save()
+        self.assertEqual([r["name"] for r in self.rooms()], ["A2", "B"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.delete()
+        self.assertEqual([r["name"] for r in self.rooms()], ["B"])
+
+
+class RoomListConditionalTests(RoomCatalogTestCase):
+    def test_etag_not_modified(self):
+        self.add_room("A")
+        response = self.client.get("/api/rooms/list/")
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+
+        response = self.client.get("/api/rooms/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        self.add_room("B")
+        response = self.client.get("/api/rooms/list/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class RoomListAsyncTests(RoomCatalogTestCase):
+    def test_matches_sync_view(self):
+        self.add_room("A")
+        user = User.objects.get()
+        token = UserRefreshToken.for_user(user).access_token
+        response = self.client.get(
+            "/api/rooms/async/list/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.json()["data"], self.rooms())
+        self.assertEqual(response["ETag"], self.client.get("/api/rooms/list/")["ETag"])
@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import room_list_view
+from .async_views import room_list_async_view
 
 urlpatterns = [
-    path("list/", room_list_view),
+    path("list/", room_list_view, name="room_list"),
+    path("async/list/", room_list_async_view, name="room_list_async"),
 ]
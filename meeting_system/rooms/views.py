@@ -1,7 +1,7 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rooms.models import MeetingRoom
-from .serializers import MeetingRoomSerializer
+from meeting_system.conditional import not_modified, set_validators
+from .catalog import get_catalog, get_catalog_version
 
 
 @api_view(["GET"])
@@ -9,15 +9,16 @@ def room_list_view(request):
     """
     GET /api/rooms/list/
     """
-    rooms = MeetingRoom.objects.all()
-    serializer = MeetingRoomSerializer(
-        rooms,
-        many=True,
-        context={"request": request}  # ⭐ 关键
-    )
+    # 客户端副本仍然最新时直接 304
+    etag = get_catalog_version()
+    response = not_modified(request, etag)
+    if response is not None:
+        return set_validators(response, etag)
 
-    return Response({
+    # 会议室很少变动，序列化结果走缓存，变动时由信号失效
+    response = Response({
         "code": 0,
         "msg": "ok",
-        "data": serializer.data
+        "data": get_catalog(request)
     })
+    return set_validators(response, etag)
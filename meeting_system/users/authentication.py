@@ -0,0 +1,63 @@
+"""
+无状态 JWT 认证使用的用户对象
+
+配合 JWTStatelessUserAuthentication（SIMPLE_JWT["TOKEN_USER_CLASS"]）使用：
+id、username、is_staff 直接取自令牌声明，认证本身不查库；
+视图访问其他字段（如 email）时才按 id 查询一次完整的 User 并缓存。
+
+代价：用户被停用或修改后，已签发的 access 在过期前仍然有效。
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+class ClaimsUser(TokenUser):
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(
+            self.token[api_settings.USER_ID_CLAIM]
+        )
+
+    @cached_property
+    def user(self):
+        """完整的 User，首次访问时查询"""
+        return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: self.id})
+
+    @cached_property
+    def username(self):
+        # 旧令牌不含这些声明时回退到查库
+        if "username" in self.token:
+            return self.token["username"]
+        return self.user.get_username()
+
+    @cached_property
+    def is_staff(self):
+        if "is_staff" in self.token:
+            return self.token["is_staff"]
+        return self.user.is_staff
+
+    @cached_property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    def __getattr__(self, name):
+        # 只在常规属性查找失败时调用：其余字段交给完整的 User
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        if isinstance(other, Model):
+            return (
+                other._meta.concrete_model is get_user_model() and other.pk == self.id
+            )
+        return super().__eq__(other)
+
+    __hash__ = TokenUser.__hash__
+
+    def __str__(self):
+        return self.username
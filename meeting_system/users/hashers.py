@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PolicyPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    迭代次数由 PASSWORD_PBKDF2_ITERATIONS 决定（未设置时沿用 Django 默认值）
+    算法名与默认 PBKDF2 相同，已有密码无需迁移；策略调整后，
+    用户下次登录时 Django 会按新的迭代次数重新计算并保存
+    """
+
+    @property
+    def iterations(self):
+        return (
+            getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None)
+            or PBKDF2PasswordHasher.iterations
+        )
@@ -0,0 +1,119 @@
+"""
+登录校验
+
+- 失败次数按用户名、按 IP 分别计数，超过上限后在窗口期内直接拒绝，不再计算哈希；
+  经反向代理部署时，客户端 IP 取自 X-Forwarded-For，只信任 LOGIN_TRUSTED_PROXIES 中的代理
+- 校验成功后把 HMAC(SECRET_KEY, 用户 id + 密码哈希 + 明文密码) 缓存一小段时间，
+  期间同一账号用同一密码再次登录不再运行 PBKDF2；
+  密码哈希参与摘要，修改密码（或迭代策略变化导致重新哈希）后旧缓存自然失效
+"""
+
+import hashlib
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import caches
+
+
+class Throttled(Exception):
+    pass
+
+
+def _cache():
+    return caches[getattr(settings, "LOGIN_CACHE", "default")]
+
+
+def _trusted(ip, networks) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def client_ip(request) -> str:
+    """
+    发起登录的客户端 IP
+    直连地址属于 LOGIN_TRUSTED_PROXIES（IP 或网段）时，从 X-Forwarded-For 末尾往前
+    跳过受信任的代理，取第一个不受信任的地址；否则只用直连地址（客户端可伪造该头）
+    """
+    remote = request.META.get("REMOTE_ADDR", "")
+    networks = [
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in getattr(settings, "LOGIN_TRUSTED_PROXIES", [])
+    ]
+    if not networks or not _trusted(remote, networks):
+        return remote
+
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted(hop, networks):
+            return hop
+    return hops[0] if hops else remote
+
+
+def _failure_keys(username, ip):
+    digest = hashlib.sha256(username.encode()).hexdigest()
+    return f"login:fail:user:{digest}", f"login:fail:ip:{ip}"
+
+
+def _verified_key(user, password) -> str:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(),
+        f"{user.pk}\0{user.password}\0{password}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return f"login:ok:{digest}"
+
+
+def _record_failure(cache, key, window):
+    # add 只在键不存在时写入，窗口从第一次失败开始计算
+    if not cache.add(key, 1, timeout=window):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=window)
+
+
+def check_credentials(request, username, password):
+    """
+    校验用户名密码，成功返回 User，失败返回 None
+    尝试过于频繁时抛出 Throttled
+    """
+    cache = _cache()
+    window = getattr(settings, "LOGIN_FAILURE_WINDOW", 300)
+    user_key, ip_key = _failure_keys(username, client_ip(request))
+
+    failures = cache.get_many([user_key, ip_key])
+    max_per_user = getattr(settings, "LOGIN_MAX_FAILURES_PER_USER", 5)
+    max_per_ip = getattr(settings, "LOGIN_MAX_FAILURES_PER_IP", 50)
+    if (
+        failures.get(user_key, 0) >= max_per_user
+        or failures.get(ip_key, 0) >= max_per_ip
+    ):
+        raise Throttled
+
+    ttl = getattr(settings, "LOGIN_VERIFY_CACHE_TIMEOUT", 300)
+    if ttl:
+        user = get_user_model()._default_manager.filter(username=username).first()
+        if (
+            user is not None
+            and user.is_active
+            and cache.get(_verified_key(user, password))
+        ):
+            return user
+
+    user = authenticate(request, username=username, password=password)
+    if user is None:
+        _record_failure(cache, user_key, window)
+        _record_failure(cache, ip_key, window)
+        return None
+
+    cache.delete(user_key)
+    if ttl:
+        # authenticate 可能已按新策略重新哈希，用保存后的哈希计算键
+        cache.set(_verified_key(user, password), 1, timeout=ttl)
+    return user
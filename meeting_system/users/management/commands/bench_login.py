@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from reservations.benchmark import BENCH_PASSWORD, run_serial
+from users import login
+
+BENCH_USERNAME = "bench_login"
+
+# APIClient 请求的 REMOTE_ADDR
+BENCH_IP = "127.0.0.1"
+
+
+class Command(BaseCommand):
+    help = (
+        "在独立的测试数据库中单线程测量登录接口的吞吐量（即每核每秒登录数），对比："
+        "Django 默认迭代次数、当前哈希策略、当前策略加校验缓存"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="每组登录次数")
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=None,
+            help="作为“当前策略”测量的 PBKDF2 迭代次数，默认取 PASSWORD_PBKDF2_ITERATIONS",
+        )
+        parser.add_argument("--keepdb", action="store_true", help="保留测试数据库")
+
+    def handle(self, *args, **options):
+        default = PBKDF2PasswordHasher.iterations
+        policy = (
+            options["iterations"]
+            or getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None)
+            or default
+        )
+        scenarios = [
+            ("default", default, 0),
+            ("policy", policy, 0),
+            ("policy+cache", policy, 300),
+        ]
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, keepdb=options["keepdb"])
+        try:
+            self.stdout.write(
+                f"{'scenario':<14} {'iterations':>10} {'logins/s':>9} "
+                f"{'p50':>8} {'p99':>8} {'queries':>8}"
+            )
+            for name, iterations, ttl in scenarios:
+                with override_settings(
+                    PASSWORD_PBKDF2_ITERATIONS=iterations,
+                    LOGIN_VERIFY_CACHE_TIMEOUT=ttl,
+                ):
+                    r = self._measure(options["requests"])
+                self.stdout.write(
+                    f"{name:<14} {iterations:>10} {r['throughput_rps']:>9} "
+                    f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['queries_per_request']:>8}"
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+    def _measure(self, requests):
+        # 按当前策略生成密码哈希，避免测量中途触发重新哈希
+        user, _ = User.objects.update_or_create(
+            username=BENCH_USERNAME,
+            defaults={"password": make_password(BENCH_PASSWORD), "is_active": True},
+        )
+        # 只清除本次压测自己的校验缓存与失败计数，共享缓存中的其他数据不受影响
+        login._cache().delete_many(
+            [
+                login._verified_key(user, BENCH_PASSWORD),
+                *login._failure_keys(BENCH_USERNAME, BENCH_IP),
+            ]
+        )
+        body = {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+
+        def attempt(i):
+            response = APIClient().post("/api/auth/login/", body, format="json")
+            return response.json()["code"] == 0
+
+        return run_serial(attempt, requests)
@@ -1,3 +1,159 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import ClaimsUser
+from .login import client_ip
+from .tokens import UserRefreshToken
+
+
+class ClaimsUserTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "alice", password="pw", email="alice@example.com", is_staff=True
+        )
+
+    def test_authentication_skips_user_lookup(self):
+        token = UserRefreshToken.for_user(self.user).access_token
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/api/reservations/my/")
+        self.assertEqual(response.json()["code"], 0)
+        self.assertFalse([q for q in ctx.captured_queries if "auth_user" in q["sql"]])
+
+    def test_claims_and_lazy_fields(self):
+        user = ClaimsUser(UserRefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                (user.id, user.username, user.is_staff), (self.user.id, "alice", True)
+            )
+            self.assertEqual(user, self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "alice@example.com")
+            self.assertFalse(user.is_superuser)
+
+    def test_tokens_without_claims_fall_back_to_database(self):
+        user = ClaimsUser(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self.assertEqual((user.username, user.is_staff), ("alice", True))
+
+    def test_refreshed_access_token_keeps_claims(self):
+        refresh = UserRefreshToken.for_user(self.user)
+        response = Client().post(
+            "/api/token/refresh/",
+            {"refresh": str(refresh)},
+            content_type="application/json",
+        )
+        access = AccessToken(response.json()["access"])
+        self.assertEqual((access["username"], access["is_staff"]), ("alice", True))
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", password="pw12345")
+
+    def login(self, username, password, ip="1.1.1.1"):
+        return (
+            Client(REMOTE_ADDR=ip)
+            .post(
+                "/api/auth/login/",
+                {"username": username, "password": password},
+                content_type="application/json",
+            )
+            .json()["code"]
+        )
+
+    def test_success_and_failure(self):
+        self.assertEqual(self.login("alice", "pw12345"), 0)
+        self.assertEqual(self.login("alice", "wrong"), 404)
+        self.assertEqual(self.login("nobody", "pw12345"), 404)
+
+    def test_verification_cache(self):
+        self.assertEqual(self.login("alice", "pw12345"), 0)
+        # 命中校验缓存：只查一次用户，不再计算哈希
+        with self.assertNumQueries(1):
+            self.assertEqual(self.login("alice", "pw12345"), 0)
+
+        self.user.set_password("newpw999")
+        self.user.save()
+        self.assertEqual(self.login("alice", "pw12345"), 404)
+        self.assertEqual(self.login("alice", "newpw999"), 0)
+
+    def test_policy_change_rehashes(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login("alice", "pw12345"), 0)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_USER=3)
+    def test_throttle_per_user(self):
+        for _ in range(3):
+            self.assertEqual(self.login("alice", "wrong"), 404)
+        self.assertEqual(self.login("alice", "pw12345"), 429)
+        self.assertEqual(self.login("alice", "pw12345", ip="2.2.2.2"), 429)
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_IP=3)
+    def test_throttle_per_ip(self):
+        for username in ["a", "b", "c"]:
+            self.login(username, "x")
+        self.assertEqual(self.login("alice", "pw12345"), 429)
+        self.assertEqual(self.login("alice", "pw12345", ip="9.9.9.9"), 0)
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_IP=3, LOGIN_TRUSTED_PROXIES=["10.0.0.1"])
+    def test_throttle_per_ip_behind_proxy(self):
+        def via_proxy(username, password, client):
+            return (
+                Client(REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=client)
+                .post(
+                    "/api/auth/login/",
+                    {"username": username, "password": password},
+                    content_type="application/json",
+                )
+                .json()["code"]
+            )
+
+        for username in ["a", "b", "c"]:
+            via_proxy(username, "x", "6.6.6.6")
+        self.assertEqual(via_proxy("alice", "pw12345", "6.6.6.6"), 429)
+        self.assertEqual(via_proxy("alice", "pw12345", "7.7.7.7"), 0)
+
+    def test_inactive_user_bypasses_cache(self):
+        self.assertEqual(self.login("alice", "pw12345"), 0)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.login("alice", "pw12345"), 404)
+
+
+class ClientIPTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def request(self, remote, forwarded):
+        return self.factory.post(
+            "/", REMOTE_ADDR=remote, HTTP_X_FORWARDED_FOR=forwarded
+        )
+
+    def test_forwarded_header_ignored_without_trusted_proxies(self):
+        self.assertEqual(client_ip(self.request("10.0.0.2", "1.2.3.4")), "10.0.0.2")
+
+    @override_settings(LOGIN_TRUSTED_PROXIES=["10.0.0.0/8"])
+    def test_trusted_proxies(self):
+        request = self.request("10.0.0.2", "6.6.6.6, 1.2.3.4")
+        self.assertEqual(client_ip(request), "1.2.3.4")
+        request = self.request("10.0.0.2", "1.2.3.4, 10.0.0.9")
+        self.assertEqual(client_ip(request), "1.2.3.4")
+        # 直连地址不是受信任的代理时，不采信其 X-Forwarded-For
+        request = self.request("8.8.8.8", "1.2.3.4")
+        self.assertEqual(client_ip(request), "8.8.8.8")
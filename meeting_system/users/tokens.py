@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    在令牌中带上 username、is_staff，配合 ClaimsUser 使用时认证无需查 auth_user
+    刷新得到的 access 会复制这些声明
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        return token
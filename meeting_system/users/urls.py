@@ -2,5 +2,5 @@ from django.urls import path
 from .views import login_view
 
 urlpatterns = [
-    path("login/", login_view),
+    path("login/", login_view, name="login"),
 ]
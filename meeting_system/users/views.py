@@ -1,8 +1,8 @@
-from django.contrib.auth import authenticate
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .login import Throttled, check_credentials
+from .tokens import UserRefreshToken
 
 
 @api_view(["POST"])
@@ -14,14 +14,19 @@ def login_view(request):
     username = request.data.get("username")
     password = request.data.get("password")
 
-    user = authenticate(username=username, password=password)
+    try:
+        user = check_credentials(request, username or "", password or "")
+    except Throttled:
+        return Response(
+            {"code": 429, "msg": "登录尝试过于频繁，请稍后再试", "data": None}
+        )
     if not user:
         return Response({"code": 404, "msg": "用户名或密码错误", "data": None})
     if user.is_staff:
         return Response({"code": 403, "msg": "管理员账户禁止登录", "data": None})
 
     # 生成 JWT
-    refresh = RefreshToken.for_user(user)
+    refresh = UserRefreshToken.for_user(user)
 
     return Response(
         {